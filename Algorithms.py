@@ -1,352 +1,1093 @@
-import time
+import tracemalloc
+from collections import deque
+from contextlib import contextmanager
 from heapq import heappush, heappop
 
-from Block import Block
+import numpy as np
+
+from Grid import MAX_COST, Grid
+from Hierarchy import hierarchy
+from JumpPoints import Jumps, jump_tables
+from PriorityQueues import HeapQueue
+from SearchContext import SearchContext, begin_search
+
+# step events yielded by the solvers as (event, cell) tuples
+VISIT = 0  # a cell was taken off the frontier and expanded
+PUSH = 1  # a cell was added to the frontier
+PATH = 2  # a cell was added to the final path
+STALE = 3  # an outdated entry of a closed cell was taken off the frontier and skipped
+
+
+class SearchStats:
+
+    # counters of the last search run by run_steps while the stats are collected,
+    # counted from its step events; the frontier is the start cell plus the
+    # pushes less the visits and stale entries so far, solvers seeding more
+    # cells than the start push the others
+    def __init__(self) -> None:
+        self.searches = 0
+        self.expanded = 0
+        self.pushes = 0
+        self.stale = 0
+        self.peak_frontier = 0
+
+        # peak memory allocated while the stats were collected in bytes, if traced
+        self.peak_memory = None
+
+    # pass the step events of steps through and count them
+    def count(self, steps):
+        expanded = pushes = stale = 0
+        frontier = peak = 1
+        step = steps.__next__
+        try:
+            while True:
+                event = step()
+                kind = event[0]
+                if kind == VISIT:
+                    expanded += 1
+                    frontier -= 1
+                elif kind == PUSH:
+                    pushes += 1
+                    frontier += 1
+                    if frontier > peak:
+                        peak = frontier
+                elif kind == STALE:
+                    stale += 1
+                    frontier -= 1
+                yield event
+        except StopIteration as finished:
+            return finished.value
+        finally:
+            self.searches += 1
+            self.expanded = expanded
+            self.pushes = pushes
+            self.stale = stale
+            self.peak_frontier = peak
+
+    # the counters as result fields, None for solvers that ran no step events
+    def as_dict(self) -> dict:
+        counted = self.searches > 0
+        return {
+            "expanded": self.expanded if counted else None,
+            "pushes": self.pushes if counted else None,
+            "stale_pops": self.stale if counted else None,
+            "peak_frontier": self.peak_frontier if counted else None,
+            "peak_memory_kb": (
+                self.peak_memory / 1024 if self.peak_memory is not None else None
+            ),
+        }
+
+
+# the stats run_steps counts step events into, None unless collect_stats is
+# active so that searches without it pay one check per search and not per step
+_stats: SearchStats = None
+
+
+# count the searches run inside the with block into the stats it gives,
+# and trace their peak memory with tracemalloc if memory is set; a trace the
+# caller already runs is kept running, only its peak is reset, and the peak
+# is taken above the memory traced when the block started
+@contextmanager
+def collect_stats(memory: bool = False):
+    global _stats
+    previous = _stats
+    stats = _stats = SearchStats()
+    started = memory and not tracemalloc.is_tracing()
+    if started:
+        tracemalloc.start()
+    if memory:
+        tracemalloc.reset_peak()
+        baseline = tracemalloc.get_traced_memory()[0]
+    try:
+        yield stats
+    finally:
+        if memory:
+            stats.peak_memory = tracemalloc.get_traced_memory()[1] - baseline
+        if started:
+            tracemalloc.stop()
+        _stats = previous
+
+
+# run a solver's step generator to the end, calling draw after every step,
+# and return the path it finished with
+def run_steps(steps, draw=None) -> list[tuple]:
+    if _stats is not None:
+        steps = _stats.count(steps)
+    step = steps.__next__
+    try:
+        if draw:
+            while True:
+                step()
+                draw()
+        else:
+            while True:
+                step()
+    except StopIteration as finished:
+        return finished.value
+
+
+# False if start or end is a wall, which no solver searches from or to, or if the
+# grid's component index shows that end cannot be reached from start,
+# True otherwise, also if the grid has no index
+def reachable(grid: Grid, start: int, end: int) -> bool:
+    if grid.walls[start] or grid.walls[end]:
+        return False
+    components = grid.components
+    return components is None or components.connected(start, end)
+
+
+# walk the parent array back from end to start, mark the cells as path
+# and return the path as a list of (x, y) tuples (start excluded, end included)
+def path_steps(context: SearchContext, start: int, end: int):
+    grid = context.grid
+    parent = context.parent
+    on_path = context.on_path
+    generation = context.generation
+    path = []
+    current = end
+
+    # while the current cell is not the start cell
+    while current != start:
+        # add the current cell to the path
+        on_path[current] = generation
+        path.append(grid.coords(current))
+        yield PATH, current
+
+        # set the current cell to its parent
+        current = parent[current]
+
+    # reverse the path and return it
+    path.reverse()
+    return path
 
-# get the neighbors of a block
-def get_neighbors(block: Block, cells: list[list[Block]]) -> list[Block]:
-    # get the neighbors of the block
-    neighbors = []
 
-    # get the coordinates of the block
-    x = block.x
-    y = block.y
+# bfs algorithm that finds shortest path from start to end
+# yielding a step event for every visited, pushed and path cell
+# return the cells as a list that are in the path
+def bfs_steps(grid: Grid, start: tuple, end: tuple, context: SearchContext = None):
 
-    # get the left neighbor
-    if x > 0:
-        left = cells[y][x - 1]
-        neighbors.append(left)
+    # check if start and end are valid
+    if start is None or end is None:
+        return None
+
+    # set start and end cells
+    start_cell = grid.index(*start)
+    end_cell = grid.index(*end)
+
+    # start and end are in different components
+    if not reachable(grid, start_cell, end_cell):
+        return None
 
-    # get the right neighbor
-    if x < len(cells[0]) - 1:
-        right = cells[y][x + 1]
-        neighbors.append(right)
+    context = begin_search(grid, context)
+    generation = context.generation
+    seen = context.seen
+    parent = context.parent
+    neighbors = grid.neighbors
 
-    # get the top neighbor
-    if y > 0:
-        top = cells[y - 1][x]
-        neighbors.append(top)
+    # set start cell as checked and add it to the queue
+    # the parent of the start cell is itself
+    seen[start_cell] = generation
+    parent[start_cell] = start_cell
+    queue = deque([start_cell])
 
-    # get the bottom neighbor
-    if y < len(cells) - 1:
-        bottom = cells[y + 1][x]
-        neighbors.append(bottom)
+    # while the queue is not empty
+    while queue:
+        # get the first cell in the queue
+        cell = queue.popleft()
+        yield VISIT, cell
+
+        # if the cell is the end cell
+        if cell == end_cell:
+            return (yield from path_steps(context, start_cell, end_cell))
+
+        # for each open neighbor that has not been checked
+        for neighbor in neighbors(cell):
+            if seen[neighbor] != generation:
+                # set the neighbor as checked, set its parent and add it to the queue
+                seen[neighbor] = generation
+                parent[neighbor] = cell
+                queue.append(neighbor)
+                yield PUSH, neighbor
 
-    return neighbors
+    # return None if no path exists
+    return None
 
 
-# bfs algorithm that finds shortest path from start to end
-# and paints the path purple if it exists and yellow if checked
+# a* algorithm that finds the cheapest path from start to end, paying the cost
+# of every cell it steps onto; the manhattan distance stays admissible since
+# no cell costs less than 1; the open list is a queue from PriorityQueues
+# yielding a step event for every visited, pushed and path cell
 # return the cells as a list that are in the path
-def bfs(cells: list[list[Block]], start: tuple, end: tuple, draw=None) -> list[tuple]:
+def a_star_steps(
+    grid: Grid,
+    start: tuple,
+    end: tuple,
+    context: SearchContext = None,
+    queue: type = HeapQueue,
+):
+    # check if start and end are valid
+    if start is None or end is None:
+        return None
+
+    # set start and end cells
+    start_cell = grid.index(*start)
+    end_cell = grid.index(*end)
 
+    # start and end are in different components
+    if not reachable(grid, start_cell, end_cell):
+        return None
+
+    width = grid.width
+    end_x, end_y = end
+
+    context = begin_search(grid, context)
+    generation = context.generation
+    seen = context.seen
+    closed = context.closed
+    parent = context.parent
+    g = context.cost
+    costs = grid.costs
+    neighbors = grid.neighbors
+
+    # the keys are f scaled so that ties on f are broken in favour of the cell
+    # furthest from the start, or f alone for monotone queues, which cannot take
+    # the lower keys the tie break gives cells pushed after a pop
+    tie = 0 if queue.monotone else 1
+    scale = 1 if queue.monotone else grid.size * MAX_COST + 1
+    open_list = queue(grid.size)
+    push = open_list.push
+    pop = open_list.pop
+
+    seen[start_cell] = generation
+    parent[start_cell] = start_cell
+    g[start_cell] = 0
+    push((abs(start[0] - end_x) + abs(start[1] - end_y)) * scale, start_cell)
+
+    # while the open list is not empty
+    while open_list:
+        # get the cell with the lowest f score
+        _, current = pop()
+
+        # the key of a cell only goes down with its g, so its current entry comes
+        # out first and the entries it superseded come out after it was closed
+        if closed[current] == generation:
+            yield STALE, current
+            continue
+
+        yield VISIT, current
+
+        # if the current cell is the end cell
+        if current == end_cell:
+            return (yield from path_steps(context, start_cell, end_cell))
+
+        # add the current cell to the closed set
+        closed[current] = generation
+        current_g = g[current]
+
+        # for each open neighbor that is not in the closed set
+        for neighbor in neighbors(current):
+            if closed[neighbor] == generation:
+                continue
+
+            # calculate the new g score
+            new_g = current_g + costs[neighbor]
+
+            # if the neighbor is new or the new g score is less than the old g score
+            if seen[neighbor] != generation or new_g < g[neighbor]:
+                seen[neighbor] = generation
+                g[neighbor] = new_g
+                parent[neighbor] = current
+
+                # push the neighbor with its new f score
+                h = abs(neighbor % width - end_x) + abs(neighbor // width - end_y)
+                push((new_g + h) * scale - new_g * tie, neighbor)
+                yield PUSH, neighbor
+
+    # return None if no path exists
+    return None
+
+
+# dfs algorithm that finds a path from start to end
+# yielding a step event for every visited, pushed and path cell
+# return the cells as a list that are in the path
+def dfs_steps(grid: Grid, start: tuple, end: tuple, context: SearchContext = None):
     # check if start and end are valid
     if start is None or end is None:
         return None
 
-    # set start and end blocks
-    start_block = cells[start[1]][start[0]]
-    end_block = cells[end[1]][end[0]]
+    # set start and end cells
+    start_cell = grid.index(*start)
+    end_cell = grid.index(*end)
 
-    # set start block as checked and add it to the queue
-    start_block.is_checked = True
-    queue = [start_block]
+    # start and end are in different components
+    if not reachable(grid, start_cell, end_cell):
+        return None
 
-    # set the parent of the start block to itself
-    start_block.parent = start_block
+    context = begin_search(grid, context)
+    generation = context.generation
+    checked = context.closed
+    parent = context.parent
+    neighbors = grid.neighbors
 
-    # while the queue is not empty
-    while len(queue) > 0:
-        if draw:
-            draw()
-        # get the first block in the queue
-        block = queue.pop(0)
-
-        # if the block is the end block
-        if block == end_block:
-            # get the path
-            path = []
-            current_block = block
-
-            # while the current block is not the start block
-            while current_block != start_block:
-                if draw:
-                    draw()
-                # add the current block to the path
-                current_block.is_checked = False
-                current_block.is_path = True
-                path.append(current_block)
-
-                # set the current block to its parent
-                current_block = current_block.parent
-
-            # reverse the path and return it
-            path.reverse()
-            return path
-
-        # get the neighbors of the block
-        neighbors = get_neighbors(block, cells)
-
-        # for each neighbor
-        for neighbor in neighbors:
-            # if the neighbor is not a wall and not checked
-            if not neighbor.is_wall and not neighbor.is_checked:
-                # set the neighbor as checked
-                neighbor.is_checked = True
-
-                # set the parent of the neighbor to the block
-                neighbor.parent = block
-
-                # add the neighbor to the queue
-                queue.append(neighbor)
+    # set start cell as checked and add it to the stack
+    # the parent of the start cell is itself
+    checked[start_cell] = generation
+    parent[start_cell] = start_cell
+    stack = [start_cell]
+
+    # while the stack is not empty
+    while stack:
+        # get the last cell in the stack and set it as checked
+        cell = stack.pop()
+        checked[cell] = generation
+        yield VISIT, cell
+
+        # if the cell is the end cell
+        if cell == end_cell:
+            return (yield from path_steps(context, start_cell, end_cell))
+
+        # for each open neighbor that has not been checked
+        for neighbor in neighbors(cell):
+            if checked[neighbor] != generation:
+                # set the parent of the neighbor and add it to the stack
+                parent[neighbor] = cell
+                stack.append(neighbor)
+                yield PUSH, neighbor
 
     # return None if no path exists
     return None
 
 
-# a* algorithm that finds shortest path from start to end
-# and paints the path purple if it exists and yellow if checked
+# dijkstra algorithm that finds the cheapest path from start to end,
+# paying the cost of every cell it steps onto; the unvisited cells are kept in
+# a queue from PriorityQueues
+# yielding a step event for every visited, pushed and path cell
 # return the cells as a list that are in the path
-def a_star(
-    cells: list[list[Block]], start: tuple, end: tuple, draw=None
-) -> list[tuple]:
+def dijkstra_steps(
+    grid: Grid,
+    start: tuple,
+    end: tuple,
+    context: SearchContext = None,
+    queue: type = HeapQueue,
+):
+
     # check if start and end are valid
     if start is None or end is None:
         return None
 
-    # set start and end blocks
-    start_block = cells[start[1]][start[0]]
-    end_block = cells[end[1]][end[0]]
+    # set start and end cells
+    start_cell = grid.index(*start)
+    end_cell = grid.index(*end)
 
-    def heuristic(a: Block, b: Block) -> int:
-        return abs(a.x - b.x) + abs(a.y - b.y)
+    # start and end are in different components
+    if not reachable(grid, start_cell, end_cell):
+        return None
 
-    # begin a* algorithm
-    open_set = set()
-    closed_set = set()
-    open_set.add(start_block)
+    context = begin_search(grid, context)
+    generation = context.generation
+    seen = context.seen
+    closed = context.closed
+    parent = context.parent
+    distance = context.cost
+    costs = grid.costs
+    neighbors = grid.neighbors
+
+    # set the parent of the start cell to itself and its distance to 0
+    seen[start_cell] = generation
+    parent[start_cell] = start_cell
+    distance[start_cell] = 0
+
+    # cells keyed by their distance
+    unvisited = queue(grid.size)
+    push = unvisited.push
+    pop = unvisited.pop
+    push(0, start_cell)
+
+    # while the unvisited queue is not empty
+    while unvisited:
+        # get the cell with the smallest distance
+        current_distance, current = pop()
+
+        # the current entry of a cell comes out first, the entries it
+        # superseded come out after it was closed
+        if closed[current] == generation:
+            yield STALE, current
+            continue
+
+        closed[current] = generation
+        yield VISIT, current
+
+        # if the current cell is the end cell
+        if current == end_cell:
+            return (yield from path_steps(context, start_cell, end_cell))
+
+        # for each open neighbor
+        for neighbor in neighbors(current):
+            # calculate the new distance
+            new_distance = current_distance + costs[neighbor]
+
+            # if the neighbor is new or the new distance is less than the old distance
+            if seen[neighbor] != generation or new_distance < distance[neighbor]:
+                # set the distance and parent of the neighbor and queue it
+                seen[neighbor] = generation
+                distance[neighbor] = new_distance
+                parent[neighbor] = current
+                push(new_distance, neighbor)
+                yield PUSH, neighbor
 
-    # set the parent of the start block to itself
-    start_block.parent = start_block
+    # return None if no path exists
+    return None
 
-    start_block.g = 0
-    start_block.h = heuristic(start_block, end_block)
-    start_block.f = start_block.g + start_block.h
 
-    # while the open set is not empty
-    while len(open_set) > 0:
-        if draw:
-            draw()
-        # get the block with the lowest f score
-        current_block = None
-        for block in open_set:
-            if current_block is None or block.f < current_block.f:
-                current_block = block
-
-        # if the current block is the end block
-        if current_block == end_block:
-            # get the path
-            path = []
-            current_block = end_block
-
-            # while the current block is not the start block
-            while current_block != start_block:
-                if draw:
-                    draw()
-                # add the current block to the path
-                current_block.is_checked = False
-                current_block.is_path = True
-                path.append(current_block)
-
-                # set the current block to its parent
-                current_block = current_block.parent
-
-            # reverse the path and return it
-            path.reverse()
-            return path
-
-        # remove the current block from the open set and add it to the closed set
-        open_set.remove(current_block)
-        closed_set.add(current_block)
-
-        # get the neighbors of the current block
-        neighbors = get_neighbors(current_block, cells)
-
-        # for each neighbor
-        for neighbor in neighbors:
-            # if the neighbor is not a wall and not in the closed set
-            if not neighbor.is_wall and neighbor not in closed_set:
-                # calculate the new g score
-                new_g = current_block.g + 1
-
-                # if the neighbor is not in the open set or the new g score is less than the old g score
-                if neighbor not in open_set or new_g < neighbor.g:
-                    # set the g score of the neighbor to the new g score
-                    neighbor.g = new_g
-
-                    # calculate the new h score
-                    neighbor.h = heuristic(neighbor, end_block)
-
-                    # calculate the new f score
-                    neighbor.f = neighbor.g + neighbor.h
-
-                    # set the parent of the neighbor to the current block
-                    neighbor.parent = current_block
-
-                    # if the neighbor is not in the open set
-                    if neighbor not in open_set:
-                        # add the neighbor to the open set
-                        neighbor.is_checked = True
-                        open_set.add(neighbor)
+# dial's algorithm: dijkstra with a bucket queue, which the small integer costs
+# of the grid allow; the frontier is a ring of max cost + 1 lists indexed by
+# distance, so cells are pushed and popped in O(1) instead of through a heap
+# yielding a step event for every visited, pushed and path cell
+# return the cells as a list that are in the path
+def dial_steps(grid: Grid, start: tuple, end: tuple, context: SearchContext = None):
+
+    # check if start and end are valid
+    if start is None or end is None:
+        return None
+
+    # set start and end cells
+    start_cell = grid.index(*start)
+    end_cell = grid.index(*end)
+
+    # start and end are in different components
+    if not reachable(grid, start_cell, end_cell):
+        return None
+
+    context = begin_search(grid, context)
+    generation = context.generation
+    seen = context.seen
+    closed = context.closed
+    parent = context.parent
+    distance = context.cost
+    costs = grid.costs
+    neighbors = grid.neighbors
+
+    seen[start_cell] = generation
+    parent[start_cell] = start_cell
+    distance[start_cell] = 0
+
+    # every queued cell is less than a ring away from the current distance,
+    # so the bucket of distance d is buckets[d % ring]
+    ring = max(costs, default=1) + 1
+    buckets = [[] for _ in range(ring)]
+    buckets[0].append(start_cell)
+    queued = 1
+    current_distance = 0
+
+    while queued:
+        bucket = buckets[current_distance % ring]
+        while bucket:
+            current = bucket.pop()
+            queued -= 1
+
+            # skip entries that were superseded by a shorter path or already closed
+            if closed[current] == generation or distance[current] != current_distance:
+                yield STALE, current
+                continue
+
+            closed[current] = generation
+            yield VISIT, current
+
+            # if the current cell is the end cell
+            if current == end_cell:
+                return (yield from path_steps(context, start_cell, end_cell))
+
+            for neighbor in neighbors(current):
+                new_distance = current_distance + costs[neighbor]
+                if seen[neighbor] != generation or new_distance < distance[neighbor]:
+                    seen[neighbor] = generation
+                    distance[neighbor] = new_distance
+                    parent[neighbor] = current
+                    buckets[new_distance % ring].append(neighbor)
+                    queued += 1
+                    yield PUSH, neighbor
+
+        current_distance += 1
 
     # return None if no path exists
     return None
 
 
-# dfs algorithm that finds shortest path from start to end
-# and paints the path purple if it exists and yellow if checked
+# walk the parents of both searches out from the cell where they met, mark the
+# cells as path and return the path from start to end like path_steps does
+def meet_path_steps(context: SearchContext, start: int, end: int, meet: int):
+    grid = context.grid
+    on_path = context.on_path
+    generation = context.generation
+
+    # meet back to start through the forward parents, then meet to end
+    # through the backward parents
+    cells = []
+    current = meet
+    while current != start:
+        cells.append(current)
+        current = context.parent[current]
+    cells.reverse()
+
+    parent = context.reverse.parent
+    current = meet
+    while current != end:
+        current = parent[current]
+        cells.append(current)
+
+    path = []
+    for cell in cells:
+        on_path[cell] = generation
+        path.append(grid.coords(cell))
+        yield PATH, cell
+    return path
+
+
+# bidirectional bfs that finds shortest path from start to end by expanding
+# whole layers of the smaller of the two frontiers until they touch,
+# the layer is finished so the shortest of the paths through it is taken
+# yielding a step event for every visited, pushed and path cell
 # return the cells as a list that are in the path
-def dfs(cells: list[list[Block]], start: tuple, end: tuple, draw=None) -> list[tuple]:
+def bidirectional_bfs_steps(
+    grid: Grid, start: tuple, end: tuple, context: SearchContext = None
+):
     # check if start and end are valid
     if start is None or end is None:
         return None
 
-    # set start and end blocks
-    start_block = cells[start[1]][start[0]]
-    end_block = cells[end[1]][end[0]]
+    # set start and end cells
+    start_cell = grid.index(*start)
+    end_cell = grid.index(*end)
+
+    # start and end are in different components
+    if not reachable(grid, start_cell, end_cell):
+        return None
+
+    context = begin_search(grid, context)
+    backward = context.backward()
+    generation = context.generation
+    neighbors = grid.neighbors
+
+    # (seen, parent, distance) of the search from the start and from the end
+    sides = (
+        (context.seen, context.parent, context.cost),
+        (backward.seen, backward.parent, backward.cost),
+    )
+    for (seen, parent, distance), cell in zip(sides, (start_cell, end_cell)):
+        seen[cell] = generation
+        parent[cell] = cell
+        distance[cell] = 0
+
+    if start_cell == end_cell:
+        return (yield from path_steps(context, start_cell, end_cell))
+
+    # the end seeds the backward frontier, the start is on a frontier before
+    # any event like for every solver
+    yield PUSH, end_cell
+
+    frontiers = [[start_cell], [end_cell]]
+    best = None
+    meet = None
+
+    # while neither search has run out of cells
+    while frontiers[0] and frontiers[1]:
+        side = 0 if len(frontiers[0]) <= len(frontiers[1]) else 1
+        seen, parent, distance = sides[side]
+        other_seen, _, other_distance = sides[1 - side]
+
+        layer = []
+        for cell in frontiers[side]:
+            yield VISIT, cell
+            new_distance = distance[cell] + 1
+
+            for neighbor in neighbors(cell):
+                if seen[neighbor] != generation:
+                    seen[neighbor] = generation
+                    parent[neighbor] = cell
+                    distance[neighbor] = new_distance
+                    layer.append(neighbor)
+                    yield PUSH, neighbor
+
+                    # the neighbor was reached by the other search too
+                    if other_seen[neighbor] == generation:
+                        length = new_distance + other_distance[neighbor]
+                        if best is None or length < best:
+                            best = length
+                            meet = neighbor
+
+        if meet is not None:
+            return (yield from meet_path_steps(context, start_cell, end_cell, meet))
+        frontiers[side] = layer
 
-    # set start block as checked and add it to the stack
-    start_block.is_checked = True
-    stack = [start_block]
+    # return None if no path exists
+    return None
 
-    # set the parent of the start block to itself
-    start_block.parent = start_block
 
-    # while the stack is not empty
-    while len(stack) > 0:
-        if draw:
-            draw()
-        # get the first block in the stack
-        block = stack.pop()
-        # set block as checked
-        block.is_checked = True
-
-        # if the block is the end block
-        if block == end_block:
-            # get the path
-            path = []
-            current_block = block
-
-            # while the current block is not the start block
-            while current_block != start_block:
-                if draw:
-                    draw()
-                # add the current block to the path
-                current_block.is_checked = False
-                current_block.is_path = True
-                path.append(current_block)
-
-                # set the current block to its parent
-                current_block = current_block.parent
-
-            # reverse the path and return it
-            path.reverse()
-            return path
-
-        # get the neighbors of the block
-        neighbors = get_neighbors(block, cells)
-
-        # for each neighbor
-        for neighbor in neighbors:
-            # if the neighbor is not a wall and not checked
-            if not neighbor.is_wall and not neighbor.is_checked:
-
-                # set the parent of the neighbor to the block
-                neighbor.parent = block
-
-                # add the neighbor to the stack
-                stack.append(neighbor)
+# bidirectional a* that finds shortest path from start to end, expanding the
+# side with the smaller open list, each towards the other's end; best is the
+# shortest path found where the searches touch, and it is the shortest path
+# once the lowest f score of either open list is no less than it
+# yielding a step event for every visited, pushed and path cell
+# return the cells as a list that are in the path
+def bidirectional_a_star_steps(
+    grid: Grid, start: tuple, end: tuple, context: SearchContext = None
+):
+    # check if start and end are valid
+    if start is None or end is None:
+        return None
+
+    # set start and end cells
+    start_cell = grid.index(*start)
+    end_cell = grid.index(*end)
+
+    # start and end are in different components
+    if not reachable(grid, start_cell, end_cell):
+        return None
+
+    width = grid.width
+
+    context = begin_search(grid, context)
+    backward = context.backward()
+    generation = context.generation
+    neighbors = grid.neighbors
+
+    # (open heap, seen, closed, parent, g, goal x, goal y) of the search from the
+    # start and from the end, the open heaps hold (f, -g, cell) entries like a*
+    h = abs(start[0] - end[0]) + abs(start[1] - end[1])
+    sides = (
+        ([(h, 0, start_cell)], context.seen, context.closed, context.parent,
+         context.cost, end[0], end[1]),
+        ([(h, 0, end_cell)], backward.seen, backward.closed, backward.parent,
+         backward.cost, start[0], start[1]),
+    )
+    for (_, seen, _, parent, g, _, _), cell in zip(sides, (start_cell, end_cell)):
+        seen[cell] = generation
+        parent[cell] = cell
+        g[cell] = 0
+
+    if start_cell == end_cell:
+        return (yield from path_steps(context, start_cell, end_cell))
+
+    # the end seeds the backward frontier, the start is on a frontier before
+    # any event like for every solver
+    yield PUSH, end_cell
+
+    best = None
+    meet = None
+
+    while True:
+        # drop superseded and closed entries from the top of both open lists
+        for open_heap, _, closed, _, g, _, _ in sides:
+            while open_heap and (
+                closed[open_heap[0][2]] == generation
+                or -open_heap[0][1] != g[open_heap[0][2]]
+            ):
+                yield STALE, heappop(open_heap)[2]
+
+        # stop when either search has run out of cells or can no longer improve
+        if not sides[0][0] or not sides[1][0]:
+            break
+        lowest_f = max(sides[0][0][0][0], sides[1][0][0][0])
+        if best is not None and lowest_f >= best:
+            break
+
+        side = 0 if len(sides[0][0]) <= len(sides[1][0]) else 1
+        open_heap, seen, closed, parent, g, goal_x, goal_y = sides[side]
+        _, other_seen, _, _, other_g, _, _ = sides[1 - side]
+
+        _, _, current = heappop(open_heap)
+        closed[current] = generation
+        yield VISIT, current
+
+        new_g = g[current] + 1
+        for neighbor in neighbors(current):
+            if closed[neighbor] == generation:
+                continue
+
+            # if the neighbor is new or the new g score is less than the old g score
+            if seen[neighbor] != generation or new_g < g[neighbor]:
+                seen[neighbor] = generation
+                g[neighbor] = new_g
+                parent[neighbor] = current
+
+                # push the neighbor with its new f score
+                h = abs(neighbor % width - goal_x) + abs(neighbor // width - goal_y)
+                heappush(open_heap, (new_g + h, -new_g, neighbor))
+                yield PUSH, neighbor
+
+                # the neighbor was reached by the other search too
+                if other_seen[neighbor] == generation:
+                    length = new_g + other_g[neighbor]
+                    if best is None or length < best:
+                        best = length
+                        meet = neighbor
+
+    if meet is not None:
+        return (yield from meet_path_steps(context, start_cell, end_cell, meet))
 
     # return None if no path exists
     return None
 
 
-# dijkstra algorithm that finds shortest path from start to end
-# and paints the path purple if it exists and yellow if checked
+# walk the parents of the jump points back from end to start, filling in the
+# straight runs between them, mark the cells as path and return the path
+# like path_steps does
+def jump_path_steps(context: SearchContext, start: int, end: int):
+    grid = context.grid
+    width = grid.width
+    parent = context.parent
+    on_path = context.on_path
+    generation = context.generation
+
+    cells = []
+    current = end
+    while current != start:
+        previous = parent[current]
+        if abs(current - previous) < width:
+            step = 1 if current > previous else -1
+        else:
+            step = width if current > previous else -width
+        cells.extend(range(current, previous, -step))
+        current = previous
+    cells.reverse()
+
+    path = []
+    for cell in cells:
+        on_path[cell] = generation
+        path.append(grid.coords(cell))
+        yield PATH, cell
+    return path
+
+
+# jump point search: a* over the jump points of the grid only, the cells in the
+# straight runs between them are skipped over by the jumps, see Jumps
+# yielding a step event for every visited and pushed jump point and path cell
 # return the cells as a list that are in the path
-def dijkstra(
-    cells: list[list[Block]], start: tuple, end: tuple, draw=None
-) -> list[tuple]:
+def jump_point_steps(
+    grid: Grid, start: tuple, end: tuple, context: SearchContext, jumps: Jumps
+):
+    start_cell = grid.index(*start)
+    end_cell = grid.index(*end)
+
+    # start and end are in different components
+    if not reachable(grid, start_cell, end_cell):
+        return None
+
+    width = grid.width
+    end_x, end_y = end
+    is_open = jumps.is_open
+
+    context = begin_search(grid, context)
+    generation = context.generation
+    seen = context.seen
+    closed = context.closed
+    parent = context.parent
+    g = context.cost
+
+    seen[start_cell] = generation
+    parent[start_cell] = start_cell
+    g[start_cell] = 0
+    open_heap = [(abs(start[0] - end_x) + abs(start[1] - end_y), 0, start_cell)]
+
+    # while the open list is not empty
+    while open_heap:
+        # get the jump point with the lowest f score
+        _, neg_g, current = heappop(open_heap)
+
+        # skip entries that were superseded by a shorter path or already closed
+        if closed[current] == generation or -neg_g != g[current]:
+            yield STALE, current
+            continue
+
+        yield VISIT, current
+
+        # if the current cell is the end cell
+        if current == end_cell:
+            return (yield from jump_path_steps(context, start_cell, end_cell))
+
+        closed[current] = generation
+        x = current % width
+        y = current // width
+
+        # jump on in the direction the jump point was reached from and turn
+        # where the canonical order allows it, every way from the start
+        previous = parent[current]
+        if previous == current:
+            successors = [
+                jumps.horizontal(x, y, -1),
+                jumps.horizontal(x, y, 1),
+                jumps.vertical(x, y, -1),
+                jumps.vertical(x, y, 1),
+            ]
+        elif previous % width == x:
+            dy = 1 if current > previous else -1
+            successors = [
+                jumps.vertical(x, y, dy),
+                jumps.horizontal(x, y, -1),
+                jumps.horizontal(x, y, 1),
+            ]
+        else:
+            dx = 1 if current > previous else -1
+            successors = [jumps.horizontal(x, y, dx)]
+            for dy in (-1, 1):
+                if is_open(x, y + dy) and not is_open(x - dx, y + dy):
+                    successors.append(jumps.vertical(x, y, dy))
+
+        for neighbor in successors:
+            if neighbor == -1 or closed[neighbor] == generation:
+                continue
+
+            # the jump point is in a straight line from the current cell
+            nx = neighbor % width
+            ny = neighbor // width
+            new_g = g[current] + abs(nx - x) + abs(ny - y)
+
+            # if the jump point is new or the new g score is less than the old g score
+            if seen[neighbor] != generation or new_g < g[neighbor]:
+                seen[neighbor] = generation
+                g[neighbor] = new_g
+                parent[neighbor] = current
+
+                # push the jump point with its new f score
+                h = abs(nx - end_x) + abs(ny - end_y)
+                heappush(open_heap, (new_g + h, -new_g, neighbor))
+                yield PUSH, neighbor
 
+    # return None if no path exists
+    return None
+
+
+def jps_steps(grid: Grid, start: tuple, end: tuple, context: SearchContext = None):
     # check if start and end are valid
     if start is None or end is None:
         return None
+    return (yield from jump_point_steps(grid, start, end, context, Jumps(grid, end)))
 
-    # set start and end blocks
-    start_block = cells[start[1]][start[0]]
-    end_block = cells[end[1]][end[0]]
 
-    # set the parent of the start block to itself
-    start_block.parent = start_block
-    # set the distance of the start block to 0
-    start_block.distance = 0
+# jps+ jumps from tables precomputed on the first search of a grid
+def jps_plus_steps(
+    grid: Grid, start: tuple, end: tuple, context: SearchContext = None
+):
+    # check if start and end are valid
+    if start is None or end is None:
+        return None
+    jumps = jump_tables(grid, end)
+    return (yield from jump_point_steps(grid, start, end, context, jumps))
+
+
+# bfs one wavefront at a time: every layer is expanded at once with numpy by
+# shifting the flat cell indices of the frontier left, right, up and down and
+# masking out walls and reached cells; parents and distances are written per layer
+# yield the cells of every layer until the one with the end cell
+def wavefront_layers(
+    grid: Grid, start_cell: int, end_cell: int, context: SearchContext
+):
+    width = grid.width
+    size = grid.size
+    generation = context.generation
+
+    # numpy views of the wall plane and the context arrays, no copies
+    is_open = np.frombuffer(grid.walls, dtype=np.uint8) == 0
+    seen = np.frombuffer(context.seen, dtype=np.int32)
+    parent = np.frombuffer(context.parent, dtype=np.int32)
+    distance = np.frombuffer(context.cost, dtype=np.int32)
+
+    frontier = np.array([start_cell], dtype=np.int32)
+    seen[start_cell] = generation
+    parent[start_cell] = start_cell
+    distance[start_cell] = 0
+    layer = 0
+
+    while len(frontier):
+        yield frontier
+        if seen[end_cell] == generation:
+            return
+
+        # neighbors of the whole frontier and the cell each one was reached from
+        x = frontier % width
+        sources = (
+            frontier[x > 0],
+            frontier[x < width - 1],
+            frontier[frontier >= width],
+            frontier[frontier < size - width],
+        )
+        cells = np.concatenate(
+            (sources[0] - 1, sources[1] + 1, sources[2] - width, sources[3] + width)
+        )
+        sources = np.concatenate(sources)
+
+        # keep open cells that are reached for the first time, each once
+        new = is_open[cells] & (seen[cells] != generation)
+        frontier, first = np.unique(cells[new], return_index=True)
+
+        layer += 1
+        seen[frontier] = generation
+        parent[frontier] = sources[new][first]
+        distance[frontier] = layer
+
+
+def wavefront_bfs_steps(
+    grid: Grid, start: tuple, end: tuple, context: SearchContext = None
+):
+    # check if start and end are valid
+    if start is None or end is None:
+        return None
 
-    # set of unvisited blocks with all blocks
-    unvisited = []
+    # set start and end cells
+    start_cell = grid.index(*start)
+    end_cell = grid.index(*end)
 
-    heappush(unvisited, start_block)
+    # start and end are in different components
+    if not reachable(grid, start_cell, end_cell):
+        return None
 
-    # while the unvisited set is not empty
-    while len(unvisited) > 0:
-        if draw:
-            draw()
-        # get the block with the smallest distance
-        current_block = heappop(unvisited)
-
-        current_block.is_checked = True
-
-        # if the current block is the end block
-        if current_block == end_block:
-            # get the path
-            path = []
-            current_block = end_block
-
-            # while the current block is not the start block
-            while current_block != start_block:
-                if draw:
-                    draw()
-                # add the current block to the path
-                current_block.is_checked = False
-                current_block.is_path = True
-                path.append(current_block)
-
-                # set the current block to its parent
-                current_block = current_block.parent
-
-            # reverse the path and return it
-            path.reverse()
-            return path
-
-        # get the neighbors of the current block
-        neighbors = get_neighbors(current_block, cells)
-
-        # for each neighbor
-        for neighbor in neighbors:
-            # if the neighbor is not a wall
-            if not neighbor.is_wall:
-                # calculate the new distance
-                new_distance = current_block.distance + 1
-
-                # if the new distance is less than the old distance
-                if new_distance < neighbor.distance:
-                    # set the distance of the neighbor to the new distance
-                    neighbor.distance = new_distance
-
-                    # set the parent of the neighbor to the current block
-                    neighbor.parent = current_block
-
-                    # add the neighbor to the unvisited set
-                    heappush(unvisited, neighbor)
+    context = begin_search(grid, context)
+    layers = wavefront_layers(grid, start_cell, end_cell, context)
+    for depth, layer in enumerate(layers):
+        cells = layer.tolist()
+
+        # the cells of a layer were pushed when the layer before it was expanded
+        if depth:
+            for cell in cells:
+                yield PUSH, cell
+
+        # the search ends at the layer the end is in, of which only the end is
+        # visited, like bfs stops once it takes the end off its queue
+        if context.seen[end_cell] == context.generation:
+            yield VISIT, end_cell
+            break
+        for cell in cells:
+            yield VISIT, cell
+
+    if context.seen[end_cell] == context.generation:
+        return (yield from path_steps(context, start_cell, end_cell))
 
     # return None if no path exists
     return None
+
+
+# the solvers run to the end, calling draw after every step if it is given
+def bfs(
+    grid: Grid, start: tuple, end: tuple, draw=None, context: SearchContext = None
+) -> list[tuple]:
+    return run_steps(bfs_steps(grid, start, end, context), draw)
+
+
+# a* and dijkstra take the class of the queue they search with
+def a_star(
+    grid: Grid,
+    start: tuple,
+    end: tuple,
+    draw=None,
+    context: SearchContext = None,
+    queue: type = HeapQueue,
+) -> list[tuple]:
+    return run_steps(a_star_steps(grid, start, end, context, queue), draw)
+
+
+def dfs(
+    grid: Grid, start: tuple, end: tuple, draw=None, context: SearchContext = None
+) -> list[tuple]:
+    return run_steps(dfs_steps(grid, start, end, context), draw)
+
+
+def dijkstra(
+    grid: Grid,
+    start: tuple,
+    end: tuple,
+    draw=None,
+    context: SearchContext = None,
+    queue: type = HeapQueue,
+) -> list[tuple]:
+    return run_steps(dijkstra_steps(grid, start, end, context, queue), draw)
+
+
+def dial(
+    grid: Grid, start: tuple, end: tuple, draw=None, context: SearchContext = None
+) -> list[tuple]:
+    return run_steps(dial_steps(grid, start, end, context), draw)
+
+
+def bidirectional_bfs(
+    grid: Grid, start: tuple, end: tuple, draw=None, context: SearchContext = None
+) -> list[tuple]:
+    return run_steps(bidirectional_bfs_steps(grid, start, end, context), draw)
+
+
+def bidirectional_a_star(
+    grid: Grid, start: tuple, end: tuple, draw=None, context: SearchContext = None
+) -> list[tuple]:
+    return run_steps(bidirectional_a_star_steps(grid, start, end, context), draw)
+
+
+def jps(
+    grid: Grid, start: tuple, end: tuple, draw=None, context: SearchContext = None
+) -> list[tuple]:
+    return run_steps(jps_steps(grid, start, end, context), draw)
+
+
+def jps_plus(
+    grid: Grid, start: tuple, end: tuple, draw=None, context: SearchContext = None
+) -> list[tuple]:
+    return run_steps(jps_plus_steps(grid, start, end, context), draw)
+
+
+# without draw or stats the layers are expanded without a step event for every cell
+def wavefront_bfs(
+    grid: Grid, start: tuple, end: tuple, draw=None, context: SearchContext = None
+) -> list[tuple]:
+    if draw or _stats is not None or start is None or end is None:
+        return run_steps(wavefront_bfs_steps(grid, start, end, context), draw)
+
+    start_cell = grid.index(*start)
+    end_cell = grid.index(*end)
+    if not reachable(grid, start_cell, end_cell):
+        return None
+
+    context = begin_search(grid, context)
+    for _ in wavefront_layers(grid, start_cell, end_cell, context):
+        pass
+
+    if context.seen[end_cell] == context.generation:
+        return run_steps(path_steps(context, start_cell, end_cell))
+    return None
+
+
+# hpa* over the cached cluster hierarchy of the grid, built on the first search
+# and updated for edited clusters, its paths are near optimal
+def hpa_star(
+    grid: Grid, start: tuple, end: tuple, draw=None, context: SearchContext = None
+) -> list[tuple]:
+    # check if start and end are valid
+    if start is None or end is None:
+        return None
+
+    # start and end are in different components
+    if not reachable(grid, grid.index(*start), grid.index(*end)):
+        return None
+
+    path = hierarchy(grid).path(start, end)
+
+    # mark the path, like the path events of the other solvers
+    context = begin_search(grid, context)
+    for x, y in path or []:
+        context.on_path[grid.index(x, y)] = context.generation
+        if draw:
+            draw()
+    return path
+
+
+# solvers by the name shown in the cli and the gui
+SOLVERS = {
+    "BFS": bfs,
+    "DFS": dfs,
+    "Dijkstra": dijkstra,
+    "Dial": dial,
+    "A*": a_star,
+    "Wavefront": wavefront_bfs,
+    "Bi-BFS": bidirectional_bfs,
+    "Bi-A*": bidirectional_a_star,
+    "JPS": jps,
+    "JPS+": jps_plus,
+    "HPA*": hpa_star,
+}
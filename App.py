@@ -1,33 +1,79 @@
 from os import environ # hide pygame hello message
 environ['PYGAME_HIDE_SUPPORT_PROMPT'] = '1'
 
+import os, time, traceback
+
 import pygame
 import pygame_gui
 
 from Block import Block
-from Algorithms import bfs, dfs, dijkstra, a_star
+from Components import index_components
+from Grid import Grid
+from LifelongPlanner import LifelongPlanner, lpa_star_steps
+from MazeFile import BINARY_EXTENSION, is_binary, read_maze, write_maze
+from PixelRenderer import PixelRenderer
+from SearchContext import SearchContext
+from SolverThread import SolverThread
+from Viewport import Viewport
+from Algorithms import (
+    a_star_steps,
+    bfs_steps,
+    bidirectional_a_star_steps,
+    bidirectional_bfs_steps,
+    dfs_steps,
+    dial_steps,
+    dijkstra_steps,
+    jps_plus_steps,
+    jps_steps,
+    wavefront_bfs_steps,
+)
 
 
 class App:
 
+    # whether an algorithm finds the cheapest path, the unit cost ones find the
+    # path with the fewest steps and ignore painted costs
     ALGO_DESC = {
-        "BFS": "Yes",
+        "BFS": "Fewest steps",
         "DFS": "No",
         "Dijkstra": "Yes",
+        "Dial": "Yes",
         "A*": "Yes",
+        "Wavefront": "Fewest steps",
+        "Bi-BFS": "Fewest steps",
+        "Bi-A*": "Fewest steps",
+        "JPS": "Fewest steps",
+        "JPS+": "Fewest steps",
+        "LPA*": "Fewest steps",
     }
 
+    # grids with more cells per side than this are drawn by the pixel renderer
+    PIXEL_GRID_SIZE = 50
+
     ALGOS = {
-        "BFS": bfs,
-        "DFS": dfs,
-        "Dijkstra": dijkstra,
-        "A*": a_star,
+        "BFS": bfs_steps,
+        "DFS": dfs_steps,
+        "Dijkstra": dijkstra_steps,
+        "Dial": dial_steps,
+        "A*": a_star_steps,
+        "Wavefront": wavefront_bfs_steps,
+        "Bi-BFS": bidirectional_bfs_steps,
+        "Bi-A*": bidirectional_a_star_steps,
+        "JPS": jps_steps,
+        "JPS+": jps_plus_steps,
+        "LPA*": lpa_star_steps,
     }
 
+    # algorithms whose plan is kept after a search and repaired after wall edits
+    REPLANNERS = {"LPA*": LifelongPlanner}
+
     def __init__(
         self,
         w: int = 800,
         h: int = 800,
+        steps_per_frame: int = 20,
+        frame_budget: float = None,
+        filename: str = None,
     ) -> None:
         # initialize pygame
         pygame.init()
@@ -39,19 +85,45 @@ class App:
         self.distance = None
         self.distance_calculated = False
 
+        # the running search is a solver thread whose step events are shown a
+        # few every frame, either a fixed number of steps or as many as fit in
+        # frame_budget seconds
+        self.solver = None
+        self.start_button = None
+        self.steps_per_frame = steps_per_frame
+        self.frame_budget = frame_budget
+
+        # the plan of the last replanning search and the walls changed since,
+        # it is repaired once a frame while no search is running
+        self.planner = None
+        self.changed_walls = set()
+
+        # only cells that changed since the last frame are drawn again,
+        # unless something changed the whole board
+        self.dirty = set()
+        self.full_redraw = True
+        self.dropdowns = []
+        self.dropdown_expanded = False
+
+        # cost painted onto cells by clicking and dragging, None to edit walls
+        self.brush = None
+
         self.is_running = True
         self.algorithm = "A*"
-        self.grid_sizes = ["10x10", "20x20", "30x30", "40x40", "50x50"]
-        self.selected_grid_size = self.grid_sizes[2]
-
-        self.cells = [
-            [Block(x, y) for x in range(int(self.selected_grid_size.split("x")[0]))]
-            for y in range(int(self.selected_grid_size.split("x")[1]))
+        self.grid_sizes = [
+            "10x10",
+            "20x20",
+            "30x30",
+            "40x40",
+            "50x50",
+            "100x100",
+            "200x200",
+            "400x400",
         ]
+        self.selected_grid_size = self.grid_sizes[2]
 
-        # start and end blocks
-        self.start_block: tuple = None
-        self.end_block: tuple = None
+        # maze file used by save and load, loaded at its own size
+        self.filename = filename
 
         # create window and gui manager and set window title
         pygame.display.set_caption("Pathfinding Visualizer")
@@ -66,95 +138,294 @@ class App:
             manager=self.gui_manager,
         )
 
+        # area repainted for the UI every frame, the labels hang below the buttons
+        self.ui_rect = pygame.Rect(0, 0, self.W_WIDTH, 50).union(
+            self.shortest_distance_path_label.rect
+        )
+
+        # the grid holds the maze and the context holds the state of the last search,
+        # the blocks are views of both used for rendering
+        self.grid = Grid(
+            int(self.selected_grid_size.split("x")[0]),
+            int(self.selected_grid_size.split("x")[1]),
+        )
+        index_components(self.grid)
+        self.context = SearchContext(self.grid)
+        self.cells = self.make_cells()
+
+        if self.filename:
+            self.load()
+
+    def make_cells(self) -> list[list[Block]]:
+        # block rects and the empty board background only depend on the grid size,
+        # so they are computed once here instead of on every draw
+        width = self.W_WIDTH / self.grid.width
+        height = (self.W_HEIGHT - 50) / self.grid.height
+        self.background = pygame.Surface((self.W_WIDTH, self.W_HEIGHT))
+        self.full_redraw = True
+
+        # the viewport maps the grid below the UI, zoomed and panned by the user,
+        # and the pixel renderer draws only the cells it shows
+        self.viewport = Viewport(
+            pygame.Rect(0, 50, self.W_WIDTH, self.W_HEIGHT - 50),
+            self.grid.width,
+            self.grid.height,
+        )
+        self.renderer = PixelRenderer(self.grid, self.context, self.viewport)
+
+        # large grids skip the blocks and are always drawn by the pixel renderer
+        if max(self.grid.width, self.grid.height) > App.PIXEL_GRID_SIZE:
+            self.blocks = []
+            self.ui_blocks = []
+            return []
+
+        cells = []
+        for y in range(self.grid.height):
+            row = []
+            for x in range(self.grid.width):
+                # leave a 1px gap between blocks, +50 to account for UI
+                rect = pygame.Rect(
+                    x * width + 1, y * height + 1 + 50, width - 1, height - 1
+                )
+                pygame.draw.rect(self.background, Block.WHITE, rect)
+                row.append(Block(self.grid, self.context, x, y, rect))
+            cells.append(row)
+
+        # flat list of blocks indexed like the grid cells
+        self.blocks = [block for row in cells for block in row]
+        self.ui_blocks = [
+            block for block in self.blocks if block.rect.colliderect(self.ui_rect)
+        ]
+        return cells
+
     def update_cells(self, new_size: str) -> None:
+        self.set_grid(Grid(int(new_size.split("x")[0]), int(new_size.split("x")[1])))
+
+    def set_grid(self, grid: Grid) -> None:
+        self.stop_search()
+        self.planner = None
         self.shortest_distance_path_label.set_text("")
-        self.cells = [
-            [Block(x, y) for x in range(int(new_size.split("x")[0]))]
-            for y in range(int(new_size.split("x")[1]))
-        ]
+        self.grid = grid
+        index_components(self.grid)
+        self.context = SearchContext(self.grid)
+        self.cells = self.make_cells()
 
     def clear_board(self) -> None:
-        for row in self.cells:
-            for block in row:
-                block.is_wall = False
-                block.is_start = False
-                block.is_end = False
-                block.is_checked = False
-                block.is_path = False
-
-        self.start_block = None
-        self.end_block = None
+        self.stop_search()
+        self.planner = None
+        self.grid.clear()
+        self.context.reset()
+        self.full_redraw = True
         self.distance_calculated = False
         self.shortest_distance_path_label.set_text("")
 
     def restart(self) -> None:
-        # clear all paths and checked blocks and dijkstra variables and a* variables
+        # stop the running search and clear all paths and checked blocks
+        self.stop_search()
+        self.planner = None
+        self.changed_walls.clear()
         self.shortest_distance_path_label.set_text("")
-        self.distance_calculated = False
-        for row in self.cells:
-            for block in row:
-                block.is_checked = False
-                block.is_path = False
-                block.g = float("inf")
-                block.h = 0
-                block.f = float("inf")
-                block.distance = float("inf")
-
+        self.context.reset()
+        self.full_redraw = True
         self.distance_calculated = False
 
     def start(self) -> None:
         self.restart()
+        # every search needs both endpoints, the replanners cannot even be built
+        if self.grid.start is None or self.grid.end is None:
+            self.shortest_distance_path_label.set_text("Place a start and an end")
+            return
         print("Start Pathfinding with " + self.algorithm)
-        dist = self.ALGOS[self.algorithm](
-            self.cells, self.start_block, self.end_block, self.draw
-        )
-        self.distance = len(dist) if dist else None
-        self.distance_calculated = True
-
-    def save(self) -> None:
-        with open(f"{self.selected_grid_size}.maze", "w") as f:
-            for row in self.cells:
-                for block in row:
-                    if block.is_wall:
-                        f.write("w")
-                    elif block.is_start:
-                        f.write("s")
-                    elif block.is_end:
-                        f.write("e")
-                    else:
-                        f.write(".")
-                f.write("\n")
+        # relabel walled off regions here rather than on the solver thread
+        self.grid.components.update()
+        if self.algorithm in self.REPLANNERS:
+            self.planner = self.REPLANNERS[self.algorithm](
+                self.grid, self.grid.start, self.grid.end, self.context
+            )
+            steps = self.planner.plan_steps()
+        else:
+            steps = self.ALGOS[self.algorithm](
+                self.grid, self.grid.start, self.grid.end, self.context
+            )
+        self.solver = SolverThread(steps)
+        self.solver.start()
+        if self.start_button:
+            self.start_button.set_text("Cancel")
+
+    def stop_search(self) -> None:
+        # the solver thread has exited once cancel returns
+        if self.solver is not None:
+            self.solver.cancel()
+            self.solver = None
+        if self.start_button:
+            self.start_button.set_text("Start")
+
+    def cancel(self) -> None:
+        if self.solver is not None:
+            print("Cancel Pathfinding with " + self.algorithm)
+            self.stop_search()
+            self.planner = None
+            self.shortest_distance_path_label.set_text("Cancelled")
+
+    def step_search(self) -> None:
+        if self.solver is None:
+            return
+
+        # take the step events the solver thread has sent so far,
+        # the cell of every step event has to be drawn again
+        dirty = self.dirty.add
+        if self.frame_budget:
+            deadline = time.perf_counter() + self.frame_budget
+            while time.perf_counter() < deadline:
+                events = self.solver.take(32)
+                if not events:
+                    break
+                for _, cell in events:
+                    dirty(cell)
+        else:
+            for _, cell in self.solver.take(self.steps_per_frame):
+                dirty(cell)
+
+        if self.solver.done:
+            solver = self.solver
+            self.stop_search()
+            # a solver that failed is reported and the window stays open
+            if solver.error:
+                traceback.print_exception(solver.error)
+                self.shortest_distance_path_label.set_text(
+                    f"Error: {type(solver.error).__name__}"
+                )
+                return
+
+            self.distance_calculated = True
+            self.show_distance(solver.path)
+
+    # show the steps and the cost of a path found, on unweighted grids they agree
+    def show_distance(self, path: list[tuple]) -> None:
+        self.distance = len(path) if path else None
+        if path and self.grid.is_weighted:
+            self.shortest_distance_path_label.set_text(
+                f"Distance: {self.distance}, cost {self.grid.path_cost(path)}"
+            )
+        else:
+            self.shortest_distance_path_label.set_text(f"Distance: {self.distance}")
+
+    # the solver thread reads the grid while it searches, so a running search is
+    # cancelled before any wall or cost is edited
+    def before_edit(self) -> None:
+        if self.solver is not None:
+            self.cancel()
+
+    # set or clear a wall, a kept plan is repaired around it on the next frame
+    def set_wall(self, x: int, y: int, value: bool) -> None:
+        self.before_edit()
+        self.grid.set_wall(x, y, value)
+        if self.planner is not None:
+            self.changed_walls.add(self.grid.index(x, y))
+
+    # repair the kept plan around the walls changed since the last frame and
+    # show the cells it had to visit again and the new path
+    def replan(self) -> None:
+        if self.planner is None or not self.changed_walls:
+            return
+
+        self.planner.update_walls(self.changed_walls)
+        self.changed_walls.clear()
+        steps = self.planner.plan_steps()
+        try:
+            while True:
+                next(steps)
+        except StopIteration as finished:
+            path = finished.value
+
+        self.full_redraw = True
+        self.show_distance(path)
+
+    # paint the brush cost onto a cell, opening it if it is a wall
+    def paint(self, x: int, y: int) -> None:
+        self.before_edit()
+        if self.grid.is_wall(x, y):
+            self.set_wall(x, y, False)
+        self.grid.set_cost(x, y, self.brush)
+
+    # the extension picks the text or binary format, a maze file in the other
+    # format is saved next to it under the extension of this one
+    def save(self, extension: str = ".maze") -> None:
+        filename = self.filename
+        if filename is None:
+            filename = f"{self.grid.width}x{self.grid.height}{extension}"
+        elif is_binary(filename) != (extension == BINARY_EXTENSION):
+            filename = os.path.splitext(filename)[0] + extension
+        write_maze(self.grid, filename)
+        print(f"Saved {filename}")
 
     def load(self) -> None:
-        self.update_cells(
-                            self.selected_grid_size
-                        )  # TODO: Make it so that the size will be determined by the maze file
-        try: 
-            with open(f"{self.selected_grid_size}.maze", "r") as f:
-                for y, line in enumerate(f):
-                    for x, char in enumerate(line):
-                        if char == "w":
-                            self.cells[y][x].is_wall = True
-                        elif char == "s":
-                            self.cells[y][x].is_start = True
-                            self.start_block = (x, y)
-                        elif char == "e":
-                            self.cells[y][x].is_end = True
-                            self.end_block = (x, y)
-        except FileNotFoundError:
-            print("No maze file found for this grid size")
-
+        # the maze is loaded at the size it was saved with, from a text file
+        # or else from a binary one
+        if self.filename:
+            filenames = [self.filename]
+        else:
+            filenames = [
+                f"{self.selected_grid_size}.maze",
+                f"{self.selected_grid_size}{BINARY_EXTENSION}",
+            ]
+        for filename in filenames:
+            try:
+                grid = read_maze(filename)
+                break
+            except FileNotFoundError:
+                pass
+        else:
+            print(f"No maze file {' or '.join(filenames)} found")
+            return
+
+        self.set_grid(grid)
 
     def draw(self) -> None:
-        self.window.fill((0, 0, 0))
-        # draw cells
-        for row in self.cells:
-            for block in row:
-                block.draw(self.cells, self.window)
+        # an expanded dropdown covers cells, so the whole board is repainted
+        # while one is open and on the frame after it closes
+        expanded = any(
+            menu.current_state is menu.menu_states["expanded"] for menu in self.dropdowns
+        )
+        full_redraw = self.full_redraw or expanded or self.dropdown_expanded
+        self.dropdown_expanded = expanded
+
+        if not self.blocks or not self.viewport.fitted:
+            # the pixel renderer redraws the visible cells in bulk when anything changed
+            if full_redraw or self.dirty:
+                full_redraw = True
+                self.window.blit(self.background, (0, 0))
+                self.renderer.draw(self.window)
+            else:
+                self.window.blit(self.background, self.ui_rect, self.ui_rect)
+                self.renderer.draw_area(self.window, self.ui_rect)
+        elif full_redraw:
+            # start from the empty board and draw the blocks that are not white
+            self.window.blit(self.background, (0, 0))
+            for block in self.blocks:
+                color = block.select_color()
+                if color != Block.WHITE:
+                    pygame.draw.rect(self.window, color, block.rect)
+        else:
+            # repaint the UI area and the blocks below it, then the changed blocks
+            self.window.blit(self.background, self.ui_rect, self.ui_rect)
+            for block in self.ui_blocks:
+                block.draw(self.window)
+            for i in self.dirty:
+                self.blocks[i].draw(self.window)
 
         # draw gui elements
         self.gui_manager.draw_ui(self.window)
-        pygame.display.update()
+
+        if full_redraw:
+            pygame.display.update()
+        else:
+            rects = [self.blocks[i].rect for i in self.dirty]
+            rects.append(self.ui_rect)
+            pygame.display.update(rects)
+
+        self.dirty.clear()
+        self.full_redraw = False
 
     def run(self) -> None:
 
@@ -165,8 +436,21 @@ class App:
             manager=self.gui_manager,
             object_id="#start_button",
         )
+        self.start_button = start
         algorithm_dropdown = pygame_gui.elements.UIDropDownMenu(
-            options_list=["A*", "Dijkstra", "BFS", "DFS"],
+            options_list=[
+                "A*",
+                "Dijkstra",
+                "Dial",
+                "BFS",
+                "DFS",
+                "Wavefront",
+                "Bi-BFS",
+                "Bi-A*",
+                "JPS",
+                "JPS+",
+                "LPA*",
+            ],
             starting_option=self.algorithm,
             relative_rect=pygame.Rect(0, 0, 100, 50),
             manager=self.gui_manager,
@@ -177,6 +461,7 @@ class App:
             relative_rect=pygame.Rect(110, 0, 100, 50),
             manager=self.gui_manager,
         )
+        self.dropdowns = [algorithm_dropdown, grid_size_dropdown]
         clear_button = pygame_gui.elements.UIButton(
             relative_rect=pygame.Rect(self.W_WIDTH - 160, 0, 80, 50),
             text="Clear",
@@ -218,16 +503,16 @@ class App:
 
                 # handle UI events
                 if event.type == pygame_gui.UI_BUTTON_PRESSED:
-                    if (
+                    # the start button cancels the search while one is running
+                    if event.ui_element == start and self.solver is not None:
+                        self.cancel()
+
+                    elif (
                         event.ui_element == start
-                        and self.start_block
-                        and self.end_block
+                        and self.grid.start
+                        and self.grid.end
                     ):
                         self.start()
-                        if self.distance_calculated:
-                            self.shortest_distance_path_label.set_text(
-                                f"Distance: {self.distance}"
-                            )
 
                     if event.ui_element == clear_button:
                         self.clear_board()
@@ -246,9 +531,8 @@ class App:
                     if event.ui_element == algorithm_dropdown:
                         print("Algorithm: " + event.text)
                         self.algorithm = event.text
-                        self.update_cells(self.selected_grid_size)
-                        self.start_block = None
-                        self.end_block = None
+                        # the maze is kept, only the last search is cleared
+                        self.restart()
                         shortest_path_label.set_text(
                             f"Shortest Path: {App.ALGO_DESC[self.algorithm]}"
                         )
@@ -257,42 +541,54 @@ class App:
                         print("Grid Size: " + event.text)
                         self.selected_grid_size = event.text
                         self.update_cells(event.text)
-                        self.start_block = None
-                        self.end_block = None
 
                 # handle clicking cells
                 if event.type == pygame.MOUSEBUTTONDOWN:
                     if event.button == 1:
-                        x, y = event.pos
-                        if y < 50:
+                        cell = self.viewport.cell_at(event.pos)
+                        if cell is None:
                             continue
-                        width = self.window.get_width() / len(self.cells[0])
-                        height = (self.window.get_height() - 50) / len(self.cells)
-                        x = int(x / width)
-                        y = int((y - 50) / height)
-                        if self.start_block is None:
-                            self.start_block = (x, y)
-                            self.cells[y][x].is_start = True
-                        elif self.end_block is None and (x, y) != self.start_block:
-                            self.end_block = (x, y)
-                            self.cells[y][x].is_end = True
-                        elif (x, y) != self.start_block and (x, y) != self.end_block:
-                            self.cells[y][x].is_wall = not self.cells[y][x].is_wall
+                        x, y = cell
+                        self.dirty.add(self.grid.index(x, y))
+                        # the start and end cost 1, see Grid.costs
+                        if self.grid.start is None:
+                            self.grid.start = (x, y)
+                            self.grid.set_cost(x, y, 1)
+                        elif self.grid.end is None and (x, y) != self.grid.start:
+                            self.grid.end = (x, y)
+                            self.grid.set_cost(x, y, 1)
+                        elif (x, y) != self.grid.start and (x, y) != self.grid.end:
+                            if self.brush:
+                                self.paint(x, y)
+                            else:
+                                self.set_wall(x, y, not self.grid.is_wall(x, y))
                         else:
                             pass  # do nothing
 
                 # handle dragging cells for walls
                 if event.type == pygame.MOUSEMOTION:
                     if pygame.mouse.get_pressed()[0]:
-                        x, y = event.pos
-                        if y < 50:
+                        cell = self.viewport.cell_at(event.pos)
+                        if cell is None:
                             continue
-                        width = self.window.get_width() / len(self.cells[0])
-                        height = (self.window.get_height() - 50) / len(self.cells)
-                        x = int(x / width)
-                        y = int((y - 50) / height)
-                        if (x, y) != self.start_block and (x, y) != self.end_block:
-                            self.cells[y][x].is_wall = True
+                        x, y = cell
+                        if (x, y) != self.grid.start and (x, y) != self.grid.end:
+                            if self.brush:
+                                self.paint(x, y)
+                            elif not self.grid.is_wall(x, y):
+                                self.set_wall(x, y, True)
+                            self.dirty.add(self.grid.index(x, y))
+
+                # handle dragging with the right button to pan the view
+                if event.type == pygame.MOUSEMOTION:
+                    if pygame.mouse.get_pressed()[2]:
+                        self.viewport.pan(*event.rel)
+                        self.full_redraw = True
+
+                # handle the mouse wheel to zoom around the mouse
+                if event.type == pygame.MOUSEWHEEL:
+                    self.viewport.zoom(1.25**event.y, pygame.mouse.get_pos())
+                    self.full_redraw = True
 
                 # handle keyboard input
                 if event.type == pygame.KEYDOWN:
@@ -305,12 +601,14 @@ class App:
                     if event.key == pygame.K_s:
                         self.save()
 
+                    if event.key == pygame.K_b:
+                        self.save(BINARY_EXTENSION)
+
                     if event.key == pygame.K_RETURN:
                         self.start()
-                        if self.distance_calculated:
-                            self.shortest_distance_path_label.set_text(
-                                f"Distance: {self.distance}"
-                            )
+
+                    if event.key == pygame.K_ESCAPE:
+                        self.cancel()
 
                     if event.key == pygame.K_q:
                         self.is_running = False
@@ -318,9 +616,32 @@ class App:
                     if event.key == pygame.K_l:
                         self.load()
 
-            # update gui and draw window
+                    # 1 to 9 paint that cost onto cells, 0 goes back to walls
+                    if pygame.K_0 <= event.key <= pygame.K_9:
+                        self.brush = event.key - pygame.K_0 or None
+                        print(f"Brush: {self.brush or 'walls'}")
+
+                    if event.key == pygame.K_f:
+                        self.viewport.fit()
+                        self.full_redraw = True
+
+                    # pan the view by a quarter of its size
+                    pan = {
+                        pygame.K_LEFT: (self.viewport.rect.width / 4, 0),
+                        pygame.K_RIGHT: (-self.viewport.rect.width / 4, 0),
+                        pygame.K_UP: (0, self.viewport.rect.height / 4),
+                        pygame.K_DOWN: (0, -self.viewport.rect.height / 4),
+                    }
+                    if event.key in pan:
+                        self.viewport.pan(*pan[event.key])
+                        self.full_redraw = True
+
+            # repair the kept plan, advance the running search, update gui and draw window
+            self.replan()
+            self.step_search()
             self.gui_manager.update(time_delta)
 
             self.draw()
 
+        self.stop_search()
         pygame.quit()
@@ -0,0 +1,346 @@
+import csv, functools, gc, glob, json, math, os, statistics, subprocess, sys, time
+
+from Algorithms import SOLVERS, collect_stats
+from Hierarchy import hierarchy
+from Components import index_components
+from Grid import MAX_COST, Grid
+from JumpPoints import jump_tables
+from MazeCache import MazeCache
+from MazeFile import BINARY_EXTENSION, read_maze
+from MazeGenerator import add_terrain, noise_maze
+from PriorityQueues import QUEUES
+from SearchContext import SearchContext
+
+# columns of a benchmark result, in the order they are written to csv
+FIELDS = [
+    "maze",
+    "algorithm",
+    "distance",
+    "cost",
+    "runs",
+    "warmup",
+    "min_ms",
+    "median_ms",
+    "p95_ms",
+    "mean_ms",
+    "stddev_ms",
+    "preprocess_ms",
+    "expanded",
+    "pushes",
+    "stale_pops",
+    "peak_frontier",
+    "peak_memory_kb",
+]
+
+# columns of a queue benchmark result
+QUEUE_FIELDS = ["maze", "algorithm", "queue"] + FIELDS[2 : FIELDS.index("preprocess_ms")]
+
+# solvers that take a priority queue
+QUEUE_SOLVERS = ["Dijkstra", "A*"]
+
+# sides of the generated grids the queue benchmark runs on besides the maze files
+QUEUE_GRID_SIZES = [100, 300, 1000]
+
+# wall density of the generated grids, low enough for start and end to be
+# connected on most seeds
+QUEUE_GRID_DENSITY = 0.2
+
+
+# preprocessing done once per maze before any timed run, by the name of the
+# algorithm it is done for; the component labels are used by every algorithm
+PREPROCESSING = {
+    "Components": index_components,
+    "JPS+": lambda grid: jump_tables(grid, grid.end),
+    "HPA*": hierarchy,
+}
+
+
+# run every preprocessing step on grid, return the time each one took in milliseconds
+def preprocess(grid: Grid) -> dict:
+    times = {}
+    for name, step in PREPROCESSING.items():
+        start_time = time.perf_counter_ns()
+        step(grid)
+        times[name] = (time.perf_counter_ns() - start_time) / 1e6
+    return times
+
+
+# run solver warmup times untimed, then repeat times timed with perf_counter_ns
+# every run starts from a freshly reset context, so no state is shared between runs
+# return the path of the last run and the time of every timed run in nanoseconds
+def time_solver(
+    solver,
+    grid: Grid,
+    start: tuple,
+    end: tuple,
+    context: SearchContext,
+    repeat: int = 1,
+    warmup: int = 0,
+) -> tuple:
+    for _ in range(warmup):
+        solver(grid, start, end, context=context)
+
+    # keep the garbage collector out of the timed runs, like timeit does
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        path = None
+        times = []
+        for _ in range(repeat):
+            start_time = time.perf_counter_ns()
+            path = solver(grid, start, end, context=context)
+            times.append(time.perf_counter_ns() - start_time)
+    finally:
+        if gc_enabled:
+            gc.enable()
+
+    return path, times
+
+
+# nearest-rank percentile of a sorted list
+def percentile(values: list, p: float):
+    return values[max(math.ceil(p / 100 * len(values)) - 1, 0)]
+
+
+# statistics of a list of run times in nanoseconds, reported in milliseconds
+def summarize(times: list) -> dict:
+    ms = sorted(t / 1e6 for t in times)
+    return {
+        "runs": len(ms),
+        "min_ms": ms[0],
+        "median_ms": statistics.median(ms),
+        "p95_ms": percentile(ms, 95),
+        "mean_ms": statistics.fmean(ms),
+        "stddev_ms": statistics.stdev(ms) if len(ms) > 1 else 0.0,
+    }
+
+
+# maze files named by a directory, a glob pattern or a single path
+def find_mazes(pattern: str) -> list[str]:
+    if os.path.isdir(pattern):
+        return sorted(
+            glob.glob(os.path.join(pattern, "*.maze"))
+            + glob.glob(os.path.join(pattern, "*" + BINARY_EXTENSION))
+        )
+    return sorted(glob.glob(pattern))
+
+
+# per worker process state: the mazes it has loaded, with a context for each,
+# and the (maze, algorithm) pairs it has already warmed up
+_worker_mazes = {}
+_worker_warm = set()
+
+
+# pin every worker process to its own cpu from cpus, in the order they start
+def _pin_worker(cpus: list[int], counter) -> None:
+    with counter.get_lock():
+        cpu = cpus[counter.value % len(cpus)]
+        counter.value += 1
+    os.sched_setaffinity(0, {cpu})
+
+
+# the maze and its context loaded once per worker process, from the maze cache
+# unless it is disabled
+def _worker_maze(maze: str, cache: bool) -> tuple:
+    if maze not in _worker_mazes:
+        grid = MazeCache().load(maze) if cache else read_maze(maze)
+        preprocess(grid)
+        _worker_mazes[maze] = (grid, SearchContext(grid))
+    return _worker_mazes[maze]
+
+
+# one timed run of an algorithm on a maze, run in a worker process
+def _run_job(job: tuple) -> tuple:
+    maze, algorithm, warmup, cache = job
+    grid, context = _worker_maze(maze, cache)
+
+    # warm up once per process, not once per run
+    if (maze, algorithm) not in _worker_warm:
+        _worker_warm.add((maze, algorithm))
+    else:
+        warmup = 0
+
+    path, times = time_solver(
+        SOLVERS[algorithm], grid, grid.start, grid.end, context, 1, warmup
+    )
+    if not path:
+        return maze, algorithm, None, None, times[0]
+    return maze, algorithm, len(path), grid.path_cost(path), times[0]
+
+
+# one untimed run of an algorithm on a maze with its step events counted and its
+# memory traced, run in a worker process
+def _run_stats_job(job: tuple) -> tuple:
+    maze, algorithm, cache = job
+    grid, context = _worker_maze(maze, cache)
+    with collect_stats(memory=True) as stats:
+        SOLVERS[algorithm](grid, grid.start, grid.end, context=context)
+    return maze, algorithm, stats.as_dict()
+
+
+# benchmark every algorithm on every maze with repeat timed runs each, spread
+# one run per job over a pool of worker processes, optionally pinned to cpus,
+# with stats every pair runs once more after all timed runs to count its steps
+# return one result per (maze, algorithm) like Cli does for a single maze
+def run_batch(
+    mazes: list[str],
+    algorithms: list[str],
+    repeat: int = 1,
+    warmup: int = 0,
+    workers: int = None,
+    cpus: list[int] = None,
+    stats: bool = False,
+    cache: bool = True,
+) -> list[dict]:
+    # interleave the repetitions so that no pair runs all of its jobs back to back
+    jobs = [
+        (maze, algorithm, warmup, cache)
+        for _ in range(repeat)
+        for maze in mazes
+        for algorithm in algorithms
+    ]
+
+    # the process pool is only imported for batch runs, it is slow to import
+    from concurrent.futures import ProcessPoolExecutor
+    from multiprocessing import Value
+
+    initializer = None
+    initargs = ()
+    if cpus:
+        if not hasattr(os, "sched_setaffinity"):
+            raise ValueError("cpu pinning is not supported on this platform")
+        # a worker pinned to a cpu the process may not run on fails to start
+        # and breaks the whole pool, so those cpus are rejected up front
+        available = os.sched_getaffinity(0)
+        unavailable = sorted(set(cpus) - available)
+        if unavailable:
+            raise ValueError(
+                f"cpus {','.join(map(str, unavailable))} are not available, "
+                f"pick from {','.join(map(str, sorted(available)))}"
+            )
+        initializer = _pin_worker
+        initargs = (cpus, Value("i", 0))
+
+    distances = {}
+    costs = {}
+    times = {}
+    with ProcessPoolExecutor(
+        workers, initializer=initializer, initargs=initargs
+    ) as pool:
+        chunksize = max(len(jobs) // ((workers or os.cpu_count() or 1) * 4), 1)
+        for maze, algorithm, distance, cost, time_ns in pool.map(
+            _run_job, jobs, chunksize=chunksize
+        ):
+            distances[maze, algorithm] = distance
+            costs[maze, algorithm] = cost
+            times.setdefault((maze, algorithm), []).append(time_ns)
+
+        counters = {}
+        if stats:
+            stats_jobs = [
+                (maze, algorithm, cache) for maze in mazes for algorithm in algorithms
+            ]
+            for maze, algorithm, counted in pool.map(_run_stats_job, stats_jobs):
+                counters[maze, algorithm] = counted
+
+    return [
+        {
+            "maze": maze,
+            "algorithm": algorithm,
+            "distance": distances[maze, algorithm],
+            "cost": costs[maze, algorithm],
+            "warmup": warmup,
+            **summarize(times[maze, algorithm]),
+            **counters.get((maze, algorithm), {}),
+        }
+        for maze in mazes
+        for algorithm in algorithms
+    ]
+
+
+# noise mazes of every size in QUEUE_GRID_SIZES with terrain costs up to MAX_COST,
+# by name
+def queue_grids(seed: int = 0) -> dict:
+    grids = {}
+    for n in QUEUE_GRID_SIZES:
+        grid = noise_maze(n, n, seed, QUEUE_GRID_DENSITY)
+        add_terrain(grid, MAX_COST, seed)
+        grids[f"noise {n}x{n}"] = grid
+    return grids
+
+
+# time every solver that takes a priority queue with every queue on every grid,
+# grids by name, and return one result per (grid, solver, queue)
+def run_queues(grids: dict, repeat: int = 1, warmup: int = 0) -> list[dict]:
+    results = []
+    for maze, grid in grids.items():
+        index_components(grid)
+        context = SearchContext(grid)
+        for algorithm in QUEUE_SOLVERS:
+            for name, queue in QUEUES.items():
+                solver = functools.partial(SOLVERS[algorithm], queue=queue)
+                path, times = time_solver(
+                    solver, grid, grid.start, grid.end, context, repeat, warmup
+                )
+                results.append(
+                    {
+                        "maze": maze,
+                        "algorithm": algorithm,
+                        "queue": name,
+                        "distance": len(path) if path else None,
+                        "cost": grid.path_cost(path) if path else None,
+                        "warmup": warmup,
+                        **summarize(times),
+                    }
+                )
+    return results
+
+
+# modules the headless commands must not load, they take most of the startup
+# time of the gui and the plots
+GUI_MODULES = ["pygame", "pygame_gui", "matplotlib"]
+
+# modules the headless commands start from, the model, solvers, maze files and cli
+STARTUP_MODULES = ["Grid", "MazeFile", "Algorithms", "Cli", "main"]
+
+
+# import module in a fresh interpreter repeat times, return the import times and
+# the times of the whole process in nanoseconds and the GUI_MODULES it loaded
+def startup_times(module: str, repeat: int = 1) -> tuple:
+    code = (
+        "import sys, time\n"
+        "start = time.perf_counter_ns()\n"
+        f"import {module}\n"
+        "print(time.perf_counter_ns() - start)\n"
+        f"print(*[m for m in {GUI_MODULES!r} if m in sys.modules])\n"
+    )
+    directory = os.path.dirname(os.path.abspath(__file__))
+
+    import_times = []
+    process_times = []
+    loaded = set()
+    for _ in range(repeat):
+        start_time = time.perf_counter_ns()
+        output = subprocess.run(
+            [sys.executable, "-c", code],
+            capture_output=True,
+            text=True,
+            check=True,
+            cwd=directory,
+        ).stdout.splitlines()
+        process_times.append(time.perf_counter_ns() - start_time)
+        import_times.append(int(output[0]))
+        loaded.update(output[1].split())
+    return import_times, process_times, sorted(loaded)
+
+
+def write_json(filename: str, results: list[dict]) -> None:
+    with open(filename, "w") as f:
+        json.dump(results, f, indent=4)
+
+
+def write_csv(filename: str, results: list[dict], fields: list[str] = FIELDS) -> None:
+    with open(filename, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=fields, extrasaction="ignore")
+        writer.writeheader()
+        writer.writerows(results)
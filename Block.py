@@ -1,5 +1,8 @@
 import pygame
 
+from Grid import MAX_COST, Grid
+from SearchContext import SearchContext
+
 class Block:
 
     # define colors for the blocks
@@ -10,63 +13,64 @@ class Block:
     GREEN = (0, 255, 0)
     YELLOW = (255, 255, 0)
 
-    def __init__(self, x: int, y: int) -> None:
+    # colors of open cells by cost - 1, from white for cost 1 to brown for MAX_COST
+    TERRAIN = [
+        tuple(255 - (255 - c) * (cost - 1) // (MAX_COST - 1) for c in (139, 90, 43))
+        for cost in range(1, MAX_COST + 1)
+    ]
+
+    # a block is a view of one cell of a grid and of the last search on it,
+    # used for rendering
+    def __init__(
+        self, grid: Grid, context: SearchContext, x: int, y: int, rect: pygame.Rect
+    ) -> None:
+        self.grid = grid
+        self.context = context
         self.x = x
         self.y = y
-        self.color = Block.WHITE
-        self.is_wall = False
-        self.is_start = False
-        self.is_end = False
-        self.is_checked = False
-        self.is_path = False
+        self.index = grid.index(x, y)
+        self.rect = rect
 
-        # a* algorithm variables
-        self.g = float("inf")
-        self.h = 0
-        self.f = float("inf")
+    @property
+    def is_wall(self) -> bool:
+        return self.grid.walls[self.index] == 1
 
-        # dijkstra algorithm variables
-        self.distance = float("inf")
+    @property
+    def is_start(self) -> bool:
+        return self.grid.start == (self.x, self.y)
 
-    def __lt__(self, other) -> bool:
-        return self.distance < other.distance
+    @property
+    def is_end(self) -> bool:
+        return self.grid.end == (self.x, self.y)
 
-    # draw the block (block responsible for drawing itself)
-    def draw(self, cells, window: pygame.Surface) -> None:
-        def calculate_dimensions() -> tuple:
-            # calculate the dimensions of the block
-            # based on how many cells there are
-            # so that they tile the screen below the UI
-            width = window.get_width() / len(cells[0])
-            height = (window.get_height() - 50) / len(cells)
-            return width, height
+    @property
+    def cost(self) -> int:
+        return self.grid.costs[self.index]
 
-        def select_color() -> tuple:
-            # select the color of the block
-            if self.is_wall:
-                return Block.BLACK
-            elif self.is_start:
-                return Block.GREEN
-            elif self.is_end:
-                return Block.ORANGE
-            elif self.is_checked:
-                return Block.YELLOW
-            elif self.is_path:
-                return Block.PURPLE
-            else:
-                return Block.WHITE
+    @property
+    def is_checked(self) -> bool:
+        return self.context.is_checked(self.index)
 
-        # calculate the dimensions of the block
-        width, height = calculate_dimensions()
+    @property
+    def is_path(self) -> bool:
+        return self.context.is_path(self.index)
 
-        # draw the block such that there is a 1px gap between them
-        pygame.draw.rect(
-            window,
-            select_color(),
-            (
-                self.x * width + 1,
-                self.y * height + 1 + 50,  # +50 to account for UI
-                width - 1,
-                height - 1,
-            ),
-        )
+    def select_color(self) -> tuple:
+        # select the color of the block
+        if self.is_wall:
+            return Block.BLACK
+        elif self.is_start:
+            return Block.GREEN
+        elif self.is_end:
+            return Block.ORANGE
+        elif self.is_path:
+            return Block.PURPLE
+        elif self.is_checked:
+            return Block.YELLOW
+        else:
+            return Block.TERRAIN[self.cost - 1]
+
+    # draw the block (block responsible for drawing itself)
+    # into its rect, computed once per grid size by the app
+    def draw(self, window: pygame.Surface) -> None:
+        pygame.draw.rect(window, self.select_color(), self.rect)
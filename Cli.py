@@ -1,172 +1,425 @@
-import time, random
-import matplotlib.pyplot as plt
-
-from Block import Block
-from Algorithms import bfs, dfs, a_star, dijkstra
+import time
+
+from DistanceField import DistanceFieldCache
+from Grid import Grid
+from MazeCache import MazeCache
+from MazeFile import read_maze, write_maze
+from MazeGenerator import GENERATORS, add_terrain
+from Profiler import file_name, profile_calls, sample_calls, top_functions
+from SearchContext import SearchContext
+from Algorithms import SOLVERS, collect_stats
+from Benchmark import (
+    QUEUE_FIELDS,
+    QUEUE_SOLVERS,
+    STARTUP_MODULES,
+    find_mazes,
+    preprocess,
+    queue_grids,
+    run_batch,
+    run_queues,
+    startup_times,
+    summarize,
+    time_solver,
+    write_csv,
+    write_json,
+)
 
 
 class Cli:
-    def __init__(self, fn: str) -> None:
+
+    ALGOS = SOLVERS
+
+    def __init__(
+        self,
+        fn: str,
+        repeat: int = 1,
+        warmup: int = 0,
+        output: str = None,
+        cache: bool = True,
+        stats: bool = False,
+        algorithms: list[str] = None,
+    ) -> None:
         self.filename = fn
+
+        # the algorithms to run, all of them by default
+        self.algorithms = Cli.check_algorithms(algorithms)
         self.maze = None
 
+        # search state shared by all runs, reset at the start of each one
+        self.context = None
+
+        # milliseconds of every preprocessing step done when the maze was read
+        self.preprocess_ms = {}
+
         self.start_node = None
         self.end_node = None
 
-        # timing variables
-        self.bfs_time = 0
-        self.dfs_time = 0
-        self.dijkstra_time = 0
-        self.a_star_time = 0
-
-        # distance variables
-        self.bfs_distance = 0
-        self.dfs_distance = 0
-        self.dijkstra_distance = 0
-        self.a_star_distance = 0
-
-    def run_bfs(self) -> None:
-        print("Running BFS...")
-        start_time = time.time()
-        self.bfs_distance = bfs(self.maze, self.start_node, self.end_node)
-        self.bfs_time = (time.time() - start_time) 
-
-    def run_dfs(self) -> None:
-        print("Running DFS...")
-        start_time = time.time()
-        self.dfs_distance = dfs(self.maze, self.start_node, self.end_node)
-        self.dfs_time = (time.time() - start_time)
-
-    def run_dijkstra(self) -> None:
-        print("Running Dijkstra...")
-        start_time = time.time()
-        self.dijkstra_distance = dijkstra(self.maze, self.start_node, self.end_node)
-        self.dijkstra_time = (time.time() - start_time)
-
-    def run_a_star(self) -> None:
-        print("Running A*...")
-        start_time = time.time()
-        self.a_star_distance = a_star(self.maze, self.start_node, self.end_node)
-        self.a_star_time = (time.time() - start_time)
-
-    def read_maze(self) -> list[list[Block]]:
-        maze = []
-        tmp_block = None
+        # every algorithm is run warmup times untimed and then repeat times timed,
+        # results are written to output.json and output.csv if output is given
+        self.repeat = repeat
+        self.warmup = warmup
+        self.output = output
+
+        # parsed mazes are looked up in the maze cache unless it is disabled
+        self.cache = cache
+
+        # with stats every algorithm runs once more after the timed runs, with its
+        # step events counted and its memory traced, which would skew the times
+        self.stats = stats
+
+        # one result per algorithm with its distance, path cost and timing statistics
+        self.results = []
+
+    def run_algorithm(self, name: str) -> dict:
+        print(f"Running {name}...")
+        path, times = time_solver(
+            Cli.ALGOS[name],
+            self.maze,
+            self.start_node,
+            self.end_node,
+            self.context,
+            self.repeat,
+            self.warmup,
+        )
+        result = {
+            "maze": self.filename,
+            "algorithm": name,
+            "distance": len(path) if path else None,
+            "cost": self.maze.path_cost(path) if path else None,
+            "warmup": self.warmup,
+            "preprocess_ms": self.preprocess_ms.get(name, 0.0),
+            **summarize(times),
+        }
+
+        if self.stats:
+            with collect_stats(memory=True) as stats:
+                Cli.ALGOS[name](
+                    self.maze, self.start_node, self.end_node, context=self.context
+                )
+            result.update(stats.as_dict())
+        return result
+
+    # the named algorithms, all of them if none are named, exiting on unknown names
+    @staticmethod
+    def check_algorithms(algorithms: list[str] = None) -> list[str]:
+        algorithms = algorithms or list(Cli.ALGOS)
+        for name in algorithms:
+            if name not in Cli.ALGOS:
+                print(f"Unknown algorithm {name}, choose from {', '.join(Cli.ALGOS)}.")
+                exit(1)
+        return algorithms
+
+    def read_maze(self) -> Grid:
         try:
-            with open(self.filename, "r") as f:
-                for y, line in enumerate(f):
-                    tmp_row = []
-                    for x, char in enumerate(line):
-                        if char == "w":
-                            tmp_block = Block(x, y)
-                            tmp_block.is_wall = True
-                        elif char == "s":
-                            tmp_block = Block(x, y)
-                            tmp_block.is_start = True
-                            self.start_node = (x, y)
-                        elif char == "e":
-                            tmp_block = Block(x, y)
-                            tmp_block.is_end = True
-                            self.end_node = (x, y)
-                        else:
-                            tmp_block = Block(x, y)
-
-                        tmp_row.append(tmp_block)
-
-                    maze.append(tmp_row)
-
+            if self.cache:
+                maze = MazeCache().load(self.filename)
+            else:
+                maze = read_maze(self.filename)
         except FileNotFoundError:
             print(f"Maze file {self.filename} not found.")
             exit(1)
 
+        self.start_node = maze.start
+        self.end_node = maze.end
         return maze
 
     def run(self) -> None:
         self.maze = self.read_maze()
-        self.run_dfs()
-        self.run_bfs()
-        self.run_a_star()
-        self.run_dijkstra()
+        self.context = SearchContext(self.maze)
 
-        print(f"{self.filename} Results:")
-        print(
-            f"BFS: {len(self.bfs_distance) if self.bfs_distance else None} in {self.bfs_time}ms"
-        )
-        print(
-            f"DFS: {len(self.dfs_distance) if self.dfs_distance else None} in {self.dfs_time}ms"
-        )
-        print(
-            f"Dijkstra: {len(self.dijkstra_distance) if self.dijkstra_distance else None} in {self.dijkstra_time}ms"
-        )
-        print(
-            f"A*: {len(self.a_star_distance) if self.a_star_distance else None} in {self.a_star_time}ms"
-        )
+        # label the regions, so unreachable ends are found without a search, and
+        # build the jps+ tables and the hpa* hierarchy once before any timed run
+        self.preprocess_ms = preprocess(self.maze)
+        self.results = [self.run_algorithm(name) for name in self.algorithms]
 
-        # plot the results in a bar graph and write the time on the middle of the bar
-        plt.bar(
-            ["BFS", "DFS", "Dijkstra", "A*"],
-            [
-                self.bfs_time,
-                self.dfs_time,
-                self.dijkstra_time,
-                self.a_star_time,
-            ],
+        print(f"{self.filename} Results ({self.repeat} runs, {self.warmup} warmup):")
+        print(
+            "Preprocessing: "
+            + ", ".join(f"{name} {ms:.3f}ms" for name, ms in self.preprocess_ms.items())
         )
- 
-        for c in plt.gca().containers:
-            plt.gca().bar_label(c, fmt="%.3f", color="black", fontweight="bold")
-
-        plt.title(f"{self.filename} Results")
-        plt.xlabel("Algorithm")
-        plt.ylabel("Time (ms)")
-
-
+        Cli.report(self.results)
+        Cli.write_results(self.results, self.output)
+        Cli.plot(self.results, f"{self.filename} Results", self.stats)
+
+    # plot the median times in a bar graph and write the time on the middle of the bar,
+    # with stats also the expanded cells, peak frontier and peak memory of every algorithm
+    @staticmethod
+    def plot(results: list[dict], title: str, stats: bool = False) -> None:
+        # matplotlib is only imported once there is something to plot, it would
+        # take most of the startup time of every other command
+        import matplotlib.pyplot as plt
+
+        charts = [("median_ms", "Median time (ms)", "%.3f")]
+        if stats:
+            charts += [
+                ("expanded", "Expanded cells", "%d"),
+                ("peak_frontier", "Peak frontier", "%d"),
+                ("peak_memory_kb", "Peak memory (KiB)", "%.1f"),
+            ]
+
+        _, axes = plt.subplots(len(charts), 1, squeeze=False)
+        for ax, (field, label, fmt) in zip(axes[:, 0], charts):
+            # algorithms without a value, like hpa* without step events, are left out
+            shown = [result for result in results if result.get(field) is not None]
+            ax.bar(
+                [result["algorithm"] for result in shown],
+                [result[field] for result in shown],
+            )
+            for c in ax.containers:
+                ax.bar_label(c, fmt=fmt, color="black", fontweight="bold")
+            ax.set_ylabel(label)
+
+        axes[0, 0].set_title(title)
+        axes[-1, 0].set_xlabel("Algorithm")
         plt.show()
 
 
-    def generate_random_maze(n: int):
-        # generate a random n x n maze and save it to a file
-
-        # create a 2d array of blocks
-        maze = [[Block(x, y) for x in range(n)] for y in range(n)]
-
-        # randomly select a start and end node
-        start_node = (random.randint(0, n - 1), random.randint(0, n - 1))
-        end_node = (random.randint(0, n - 1), random.randint(0, n - 1))
-
-        # make sure the start and end nodes are not the same
-        while start_node == end_node:
-            end_node = (random.randint(0, n - 1), random.randint(0, n - 1))
-
-        # set the start and end nodes
-        maze[start_node[1]][start_node[0]].is_start = True
-        maze[end_node[1]][end_node[0]].is_end = True
-
-        # randomly select a number of walls
-        num_walls = random.randint(0, n * n)
-
-        # randomly select the walls
-        for _ in range(num_walls):
-            wall = (random.randint(0, n - 1), random.randint(0, n - 1))
+    # run every algorithm once under cprofile and for a while under the stack
+    # sampler, write a .pstats and a collapsed stack file for each one, named
+    # output-algorithm or profile-algorithm, and print where it spends its time
+    def run_profile(self, top: int = 10) -> None:
+        self.maze = self.read_maze()
+        self.context = SearchContext(self.maze)
+        self.preprocess_ms = preprocess(self.maze)
+        prefix = self.output or "profile"
+
+        for name in self.algorithms:
+            solver = Cli.ALGOS[name]
+
+            def run():
+                return solver(
+                    self.maze, self.start_node, self.end_node, context=self.context
+                )
+
+            print(f"Profiling {name}...")
+            _, stats = profile_calls(run)
+            stats.dump_stats(f"{prefix}-{file_name(name)}.pstats")
+            sampler = sample_calls(run)
+            sampler.write_collapsed(f"{prefix}-{file_name(name)}.collapsed")
+
+            print(
+                f"{name}: {stats.total_tt * 1000:.3f}ms under cProfile, "
+                f"{sampler.samples} stack samples"
+            )
+            for tottime, cumtime, calls, function in top_functions(stats, top):
+                print(
+                    f"    {tottime * 1000:10.3f}ms self {cumtime * 1000:10.3f}ms total "
+                    f"{calls:10d} calls  {function}"
+                )
+
+        print(f"Profiles written to {prefix}-*.pstats and {prefix}-*.collapsed")
+
+    # read start cells from a file with one "x y" or "x,y" per line
+    @staticmethod
+    def read_starts(filename: str) -> list[tuple]:
+        starts = []
+        try:
+            with open(filename, "r") as f:
+                for number, line in enumerate(f, 1):
+                    fields = line.split("#")[0].replace(",", " ").split()
+                    if not fields:
+                        continue
+                    if len(fields) != 2:
+                        raise ValueError
+                    starts.append((int(fields[0]), int(fields[1])))
+        except FileNotFoundError:
+            print(f"Starts file {filename} not found.")
+            exit(1)
+        except ValueError:
+            print(f"Line {number} of {filename} is not an \"x y\" start: {line.strip()}")
+            exit(1)
+        return starts
 
-            # make sure the wall is not the start or end node
-            while wall == start_node or wall == end_node:
-                wall = (random.randint(0, n - 1), random.randint(0, n - 1))
+    # answer the distance from every start in starts_file to the end of the maze
+    # from one distance field, built once and then walked for every start
+    def run_starts(self, starts_file: str) -> None:
+        self.maze = self.read_maze()
+        if self.end_node is None:
+            print(f"Maze file {self.filename} has no end to measure distances to.")
+            exit(1)
+        starts = Cli.read_starts(starts_file)
+        for start in starts:
+            if not self.maze.in_bounds(*start):
+                print(f"Start {start} is outside the {self.maze.width}x{self.maze.height} maze.")
+                exit(1)
+
+        fields = DistanceFieldCache()
+        start_time = time.perf_counter_ns()
+        fields.get(self.maze, self.end_node)
+        build_ms = (time.perf_counter_ns() - start_time) / 1e6
+
+        start_time = time.perf_counter_ns()
+        paths = [fields.path(self.maze, start, self.end_node) for start in starts]
+        query_ms = (time.perf_counter_ns() - start_time) / 1e6
+
+        self.results = [
+            {"start": start, "distance": len(path) if path is not None else None}
+            for start, path in zip(starts, paths)
+        ]
+        print(f"{self.filename} Distances to {self.end_node}:")
+        for result in self.results:
+            print(f"{result['start']}: {result['distance']}")
+        print(
+            f"Distance field built in {build_ms:.3f}ms, "
+            f"{len(starts)} starts answered in {query_ms:.3f}ms"
+        )
 
-            maze[wall[1]][wall[0]].is_wall = True
+        if self.output:
+            write_json(f"{self.output}.json", self.results)
+            print(f"Results written to {self.output}.json")
+
+    @staticmethod
+    def report(results: list[dict]) -> None:
+        for result in results:
+            print(
+                f"{result['algorithm']}: {result['distance']} steps, "
+                f"cost {result['cost']} in "
+                f"min {result['min_ms']:.3f}ms, "
+                f"median {result['median_ms']:.3f}ms, "
+                f"p95 {result['p95_ms']:.3f}ms, "
+                f"stddev {result['stddev_ms']:.3f}ms"
+            )
+            if result.get("expanded") is not None:
+                print(
+                    f"    expanded {result['expanded']}, "
+                    f"pushes {result['pushes']}, "
+                    f"stale pops {result['stale_pops']}, "
+                    f"peak frontier {result['peak_frontier']}, "
+                    f"peak memory {result['peak_memory_kb']:.1f}KiB"
+                )
+
+    # write results to output.json and output.csv if output is given
+    @staticmethod
+    def write_results(results: list[dict], output: str = None) -> None:
+        if output:
+            write_json(f"{output}.json", results)
+            write_csv(f"{output}.csv", results)
+            print(f"Results written to {output}.json and {output}.csv")
+
+    # benchmark every algorithm on every maze matched by pattern in a process pool
+    @staticmethod
+    def run_batch(
+        pattern: str,
+        repeat: int = 1,
+        warmup: int = 0,
+        output: str = None,
+        workers: int = None,
+        cpus: list[int] = None,
+        algorithms: list[str] = None,
+        stats: bool = False,
+        cache: bool = True,
+    ) -> None:
+        algorithms = Cli.check_algorithms(algorithms)
+        mazes = find_mazes(pattern)
+        if not mazes:
+            print(f"No maze files match {pattern}.")
+            exit(1)
 
-        # save the maze to a file
-        with open(f"{n}x{n}.maze", "w") as f:
-            for row in maze:
-                for block in row:
-                    if block.is_wall:
-                        f.write("w")
-                    elif block.is_start:
-                        f.write("s")
-                    elif block.is_end:
-                        f.write("e")
-                    else:
-                        f.write(".")
-                f.write("\n")
+        print(
+            f"Running {len(mazes)} mazes x {len(algorithms)} algorithms x {repeat} runs..."
+        )
+        try:
+            results = run_batch(
+                mazes, algorithms, repeat, warmup, workers, cpus, stats, cache
+            )
+        except ValueError as error:
+            print(f"Cannot pin the workers: {error}.")
+            exit(1)
 
+        print(f"Batch Results ({repeat} runs, {warmup} warmup):")
+        for maze in mazes:
+            print(f"{maze}:")
+            Cli.report([result for result in results if result["maze"] == maze])
+        Cli.write_results(results, output)
+
+    # time the solvers that take a priority queue with every queue on the mazes
+    # matched by pattern and on generated grids of growing size, and show which
+    # queue is fastest on each
+    @staticmethod
+    def run_queues(
+        pattern: str,
+        repeat: int = 1,
+        warmup: int = 0,
+        output: str = None,
+        seed: int = None,
+    ) -> None:
+        grids = {maze: MazeCache().load(maze) for maze in find_mazes(pattern)}
+        grids.update(queue_grids(seed or 0))
+
+        print(f"Running {len(grids)} mazes x {len(QUEUE_SOLVERS)} algorithms...")
+        results = run_queues(grids, repeat, warmup)
+
+        print(f"Queue Results ({repeat} runs, {warmup} warmup):")
+        for maze in grids:
+            print(f"{maze}:")
+            for algorithm in QUEUE_SOLVERS:
+                runs = [
+                    result
+                    for result in results
+                    if result["maze"] == maze and result["algorithm"] == algorithm
+                ]
+                for result in runs:
+                    print(
+                        f"{algorithm} {result['queue']}: {result['distance']} steps, "
+                        f"cost {result['cost']} in "
+                        f"min {result['min_ms']:.3f}ms, "
+                        f"median {result['median_ms']:.3f}ms"
+                    )
+                fastest = min(runs, key=lambda result: result["median_ms"])
+                print(f"Fastest {algorithm} queue: {fastest['queue']}")
+
+        if output:
+            write_json(f"{output}.json", results)
+            write_csv(f"{output}.csv", results, QUEUE_FIELDS)
+            print(f"Results written to {output}.json and {output}.csv")
+
+    # time importing every module the headless commands start from in a fresh
+    # interpreter, and exit with an error if one of them loads the gui or plots
+    @staticmethod
+    def run_startup(repeat: int = 1, output: str = None) -> None:
+        results = []
+        for module in STARTUP_MODULES:
+            import_times, process_times, loaded = startup_times(module, repeat)
+            results.append(
+                {
+                    "module": module,
+                    "import_ms": summarize(import_times)["median_ms"],
+                    "process_ms": summarize(process_times)["median_ms"],
+                    "gui_modules": loaded,
+                }
+            )
+
+        print(f"Startup Results ({repeat} runs, medians):")
+        for result in results:
+            loads = ", ".join(result["gui_modules"])
+            print(
+                f"{result['module']}: import {result['import_ms']:.1f}ms, "
+                f"process {result['process_ms']:.1f}ms"
+                + (f", loads {loads}" if loads else "")
+            )
+
+        if output:
+            write_json(f"{output}.json", results)
+            print(f"Results written to {output}.json")
+
+        if any(result["gui_modules"] for result in results):
+            print("Headless modules load gui or plotting modules.")
+            exit(1)
 
+    # generate an n x n maze with one of the maze generators and save it to
+    # filename, or to nxn.maze, in the format given by its extension
+    @staticmethod
+    def generate_random_maze(
+        n: int,
+        generator: str = "noise",
+        seed: int = None,
+        density: float = 0.3,
+        filename: str = None,
+        terrain: int = 1,
+    ) -> None:
+        maze = GENERATORS[generator](n, n, seed, density)
+        if terrain > 1:
+            add_terrain(maze, terrain, seed)
+        filename = filename or f"{n}x{n}.maze"
+        write_maze(maze, filename)
+        print(f"Generated {n}x{n} {generator} maze in {filename}")
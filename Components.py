@@ -0,0 +1,215 @@
+from array import array
+from collections import deque
+
+import numpy as np
+
+from Grid import Grid
+
+# the 8 cells around a cell in order around it, each 4-adjacent to the next, the
+# odd ones are its left, top, right and bottom neighbors
+RING = [(-1, -1), (0, -1), (1, -1), (1, 0), (1, 1), (0, 1), (-1, 1), (-1, 0)]
+
+# most cells the floods after a new wall expand before giving up on finding a
+# split locally and relabeling everything on the next query instead
+FLOOD_LIMIT = 4096
+
+
+class Components:
+
+    # connected component labels of the open cells of a grid, so a search whose
+    # start and end are in different regions can give up without flooding one
+    # of them; labels are run ids joined in a union-find forest, opening a cell
+    # joins its neighbors' trees and walling one off floods locally from its
+    # neighbors to find a region it cut off, only a flood larger than
+    # FLOOD_LIMIT forces a relabel on the next query
+    def __init__(self, grid: Grid) -> None:
+        self.grid = grid
+
+        # label of every cell, -1 for walls, and the union-find parent of every label
+        self.labels: array = None
+        self.parent: list[int] = None
+
+        # set when a new wall may have split a component
+        self.stale = True
+        self.update()
+
+    def update(self) -> None:
+        if self.stale:
+            self.label()
+
+    # label every horizontal run of open cells in one vectorized pass,
+    # then join runs that touch vertically
+    def label(self) -> None:
+        grid = self.grid
+        width = grid.width
+        self.stale = False
+        if not grid.size:
+            self.labels = array("i")
+            self.parent = []
+            return
+
+        is_open = np.frombuffer(grid.walls, dtype=np.uint8) == 0
+
+        # a run starts at every open cell with a wall or the grid edge to its left
+        starts = is_open.copy()
+        starts[1:] &= ~is_open[:-1]
+        starts[::width] = is_open[::width]
+        runs = np.cumsum(starts, dtype=np.int64) - 1
+
+        # pairs of runs with vertically adjacent open cells, neighboring cells of
+        # two runs give the same pair so only the first of a row of them is kept
+        # (pairs[:1] >= 0 keeps the first pair, if there is one)
+        count = int(runs[-1]) + 1
+        touching = is_open[:-width] & is_open[width:]
+        pairs = runs[:-width][touching] * count + runs[width:][touching]
+        pairs = pairs[np.concatenate((pairs[:1] >= 0, pairs[1:] != pairs[:-1]))]
+
+        # union-find over the runs, inlined since it runs once per pair
+        parent = list(range(count))
+        for pair in pairs.tolist():
+            a, b = divmod(pair, count)
+            while parent[a] != a:
+                parent[a] = parent[parent[a]]
+                a = parent[a]
+            while parent[b] != b:
+                parent[b] = parent[parent[b]]
+                b = parent[b]
+            if a != b:
+                parent[a] = b
+
+        # label every cell with the root of its run
+        roots = np.array([self.find(parent, run) for run in range(count)], np.int32)
+        labels = np.full(grid.size, -1, dtype=np.int32)
+        labels[is_open] = roots[runs[is_open]]
+
+        self.labels = array("i", labels.tobytes())
+        self.parent = parent
+
+    @staticmethod
+    def find(parent: list[int], label: int) -> int:
+        # path halving
+        while parent[label] != label:
+            parent[label] = parent[parent[label]]
+            label = parent[label]
+        return label
+
+    @staticmethod
+    def union(parent: list[int], a: int, b: int) -> None:
+        a = Components.find(parent, a)
+        b = Components.find(parent, b)
+        if a != b:
+            parent[a] = b
+
+    # keep the labels up to date after cell i became a wall or was opened
+    def set_wall(self, i: int, value: bool) -> None:
+        labels = self.labels
+        if self.stale or (labels[i] == -1) == value:
+            return
+
+        neighbors = self.grid.neighbors(i)
+        if value:
+            # a cell with one open neighbor is a dead end and cannot split anything
+            labels[i] = -1
+            if len(neighbors) > 1:
+                self.split(i)
+        else:
+            labels[i] = len(self.parent)
+            self.parent.append(labels[i])
+            for neighbor in neighbors:
+                Components.union(self.parent, labels[i], labels[neighbor])
+
+    # one open neighbor of the new wall i from every run of open cells around it,
+    # neighbors in the same run stay joined around the wall
+    def ring_seeds(self, i: int) -> list[int]:
+        grid = self.grid
+        width = grid.width
+        walls = grid.walls
+        x, y = grid.coords(i)
+        ring = []
+        for dx, dy in RING:
+            nx = x + dx
+            ny = y + dy
+            inside = 0 <= nx < width and 0 <= ny < grid.height
+            ring.append(ny * width + nx if inside and not walls[ny * width + nx] else -1)
+        if -1 not in ring:
+            return [ring[1]]
+
+        # walk the ring from a closed cell, a run starts after every closed cell
+        first = ring.index(-1)
+        seeds = []
+        seeded = False
+        for k in range(first + 1, first + 1 + len(RING)):
+            k %= len(RING)
+            if ring[k] == -1:
+                seeded = False
+            elif k % 2 and not seeded:
+                seeds.append(ring[k])
+                seeded = True
+        return seeds
+
+    # after cell i became a wall, flood from its neighbors one cell per flood in
+    # turn, joining floods that meet; a flood that runs out of cells before the
+    # last one is a region the wall cut off and gets a label of its own, so the
+    # work is bounded by the cut off regions and not by the grid
+    def split(self, i: int) -> None:
+        seeds = self.ring_seeds(i)
+        if len(seeds) < 2:
+            return
+
+        grid = self.grid
+        labels = self.labels
+        parent = self.parent
+
+        # the flood that reached every cell and the flood every flood was joined into
+        owner = {seed: flood for flood, seed in enumerate(seeds)}
+        joined = list(range(len(seeds)))
+        floods = {flood: (deque([seed]), [seed]) for flood, seed in enumerate(seeds)}
+        expanded = 0
+        while len(floods) > 1:
+            for flood in list(floods):
+                if flood not in floods or len(floods) == 1:
+                    continue
+                queue, cells = floods[flood]
+                if not queue:
+                    label = len(parent)
+                    parent.append(label)
+                    for cell in cells:
+                        labels[cell] = label
+                    del floods[flood]
+                    continue
+
+                expanded += 1
+                if expanded > FLOOD_LIMIT:
+                    self.stale = True
+                    return
+
+                for neighbor in grid.neighbors(queue.popleft()):
+                    other = owner.get(neighbor)
+                    if other is None:
+                        owner[neighbor] = flood
+                        queue.append(neighbor)
+                        cells.append(neighbor)
+                        continue
+                    other = Components.find(joined, other)
+                    if other != flood:
+                        joined[other] = flood
+                        other_queue, other_cells = floods.pop(other)
+                        queue.extend(other_queue)
+                        cells.extend(other_cells)
+
+    # False only if cells a and b are both open and in different components
+    def connected(self, a: int, b: int) -> bool:
+        self.update()
+        labels = self.labels
+        if labels[a] == -1 or labels[b] == -1:
+            return True
+        return Components.find(self.parent, labels[a]) == Components.find(
+            self.parent, labels[b]
+        )
+
+
+# label the components of grid and keep them with it, so every solver can
+# check them and Grid.set_wall keeps them up to date
+def index_components(grid: Grid) -> Components:
+    grid.components = Components(grid)
+    return grid.components
@@ -0,0 +1,185 @@
+import os, random, sys, tempfile
+
+from Algorithms import SOLVERS, a_star, bfs, dial, dijkstra, run_steps
+from Components import Components, index_components
+from DistanceField import DistanceFieldCache
+from Grid import Grid
+from Hierarchy import Hierarchy, hierarchy
+from JumpPoints import Jumps, jump_tables
+from LifelongPlanner import LifelongPlanner, lpa_star_steps
+from MazeFile import convert, read_maze, write_maze
+from MazeGenerator import add_terrain, noise_maze
+from PriorityQueues import QUEUES
+
+# solvers whose paths are not always shortest
+SUBOPTIMAL = {"DFS", "HPA*"}
+
+# random grids every check runs on by default
+TRIALS = 300
+
+
+# a random noise grid of up to size cells per side, with its components indexed
+def random_grid(rng: random.Random, size: int = 24) -> Grid:
+    width = rng.randint(2, size)
+    height = rng.randint(2, size)
+    grid = noise_maze(width, height, rng.randrange(1 << 30), rng.random() * 0.45)
+    index_components(grid)
+    return grid
+
+
+# path is a walk of open neighboring cells from start, ending at end
+def check_walk(grid: Grid, start: tuple, end: tuple, path: list[tuple]) -> None:
+    previous = start
+    for x, y in path:
+        assert abs(x - previous[0]) + abs(y - previous[1]) == 1, (previous, (x, y))
+        assert not grid.is_wall(x, y), (x, y)
+        previous = (x, y)
+    assert previous == end, (previous, end)
+
+
+# every solver finds a path exactly when bfs does, and as short as it unless
+# it does not promise shortest paths, for random starts and ends, which are
+# walls now and then and then have no path
+def check_solvers(rng: random.Random, trials: int) -> None:
+    for _ in range(trials):
+        grid = random_grid(rng)
+        start = grid.coords(rng.randrange(grid.size))
+        end = grid.coords(rng.randrange(grid.size))
+        expected = bfs(grid, start, end)
+        if grid.is_wall(*start) or grid.is_wall(*end):
+            assert expected is None
+
+        solvers = dict(SOLVERS)
+        solvers["LPA*"] = lambda grid, start, end: run_steps(
+            lpa_star_steps(grid, start, end)
+        )
+        solvers["Distance field"] = DistanceFieldCache().path
+        for name, solver in solvers.items():
+            path = solver(grid, start, end)
+            assert (path is None) == (expected is None), (name, start, end)
+            if path is None:
+                continue
+            check_walk(grid, start, end, path)
+            if name in SUBOPTIMAL:
+                assert len(path) >= len(expected), name
+            else:
+                assert len(path) == len(expected), (name, len(path), len(expected))
+
+
+# the jps+ tables give the same jump as walking it cell by cell, from every
+# open cell in every direction
+def check_jump_tables(rng: random.Random, trials: int) -> None:
+    for _ in range(trials):
+        grid = random_grid(rng, 16)
+        end = grid.coords(rng.randrange(grid.size))
+        jumps = Jumps(grid, end)
+        tables = jump_tables(grid, end)
+        for y in range(grid.height):
+            for x in range(grid.width):
+                if grid.is_wall(x, y):
+                    continue
+                for d in (-1, 1):
+                    assert tables.horizontal(x, y, d) == jumps.horizontal(x, y, d)
+                    assert tables.vertical(x, y, d) == jumps.vertical(x, y, d)
+
+
+# the two labelings split the open cells of grid into the same components
+def same_components(grid: Grid, a: Components, b: Components) -> bool:
+    a.update()
+    b.update()
+    pairs = {
+        (Components.find(a.parent, a.labels[i]), Components.find(b.parent, b.labels[i]))
+        for i in range(grid.size)
+        if not grid.walls[i]
+    }
+    return len({x for x, _ in pairs}) == len(pairs) == len({y for _, y in pairs})
+
+
+# random walls toggled one at a time, after every one of them lpa* repairs its
+# plan to the length bfs finds from scratch, hpa* still finds a path exactly
+# when bfs does and the incrementally updated components and hierarchy agree
+# with ones built from scratch
+def check_wall_edits(rng: random.Random, trials: int) -> None:
+    for _ in range(trials // 10 or 1):
+        grid = random_grid(rng, 20)
+        start = grid.start
+        end = grid.end
+        planner = LifelongPlanner(grid, start, end)
+        run_steps(planner.plan_steps())
+
+        for _ in range(20):
+            cell = rng.randrange(grid.size)
+            if grid.coords(cell) in (start, end):
+                continue
+            grid.set_wall(*grid.coords(cell), not grid.walls[cell])
+            planner.update_walls([cell])
+            path = run_steps(planner.plan_steps())
+
+            expected = bfs(grid, start, end)
+            assert (path is None) == (expected is None)
+            if path is not None:
+                check_walk(grid, start, end, path)
+                assert len(path) == len(expected)
+
+            # the hierarchy on its own, also from and to walls
+            a = grid.coords(rng.randrange(grid.size))
+            b = grid.coords(rng.randrange(grid.size))
+            hpa = hierarchy(grid).path(a, b)
+            assert (hpa is None) == (bfs(grid, a, b) is None), (a, b)
+
+            assert same_components(grid, grid.components, Components(grid))
+
+            cached = hierarchy(grid)
+            cached.update()
+            rebuilt = Hierarchy(grid)
+            assert cached.borders == rebuilt.borders
+            # cells whose last entrance went away keep an empty set of them
+            assert {c: e for c, e in cached.inter.items() if e} == rebuilt.inter
+            assert cached.intra == rebuilt.intra
+
+
+# weighted grids keep their walls, costs, start and end through the text and
+# binary formats and from binary to text and back, so the cheapest path costs the
+# same after loading, and every weighted solver and queue finds that cost
+def check_weighted_files(rng: random.Random, trials: int) -> None:
+    with tempfile.TemporaryDirectory() as directory:
+        text = os.path.join(directory, "maze.maze")
+        binary = os.path.join(directory, "maze.bmaze")
+        again = os.path.join(directory, "again.bmaze")
+        for _ in range(trials):
+            grid = random_grid(rng)
+            add_terrain(grid, rng.randint(2, 9), rng.randrange(1 << 30))
+            path = dijkstra(grid, grid.start, grid.end)
+            cost = None if path is None else grid.path_cost(path)
+
+            write_maze(grid, text)
+            write_maze(grid, binary)
+            convert(binary, text)
+            convert(text, again)
+            for filename in (text, binary, again):
+                loaded = read_maze(filename)
+                assert loaded.walls == grid.walls, filename
+                assert loaded.costs == grid.costs, filename
+                assert (loaded.start, loaded.end) == (grid.start, grid.end), filename
+
+                for solver in (dijkstra, a_star, dial):
+                    queues = QUEUES.values() if solver is not dial else [None]
+                    for queue in queues:
+                        kwargs = {} if queue is None else {"queue": queue}
+                        path = solver(loaded, loaded.start, loaded.end, **kwargs)
+                        found = None if path is None else loaded.path_cost(path)
+                        assert found == cost, (filename, solver.__name__, queue)
+
+
+CHECKS = [check_solvers, check_jump_tables, check_wall_edits, check_weighted_files]
+
+
+# run every check on trials random grids from seed, raising on the first mismatch
+def main(trials: int = TRIALS, seed: int = 0) -> None:
+    for check in CHECKS:
+        check(random.Random(seed), trials)
+        print(f"{check.__name__}: ok")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:3]))
@@ -0,0 +1,106 @@
+from collections import OrderedDict, deque
+
+from Grid import Grid
+
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+
+class DistanceField:
+
+    # distance to target and next cell towards it for every cell of the grid,
+    # from one bfs flooded out of the target; the grid is undirected, so any
+    # start is answered by following next cells in O(path length)
+    def __init__(self, grid: Grid, target: tuple) -> None:
+        self.grid = grid
+        self.target = target
+        self.version = grid.version
+
+        # -1 for cells the target cannot be reached from
+        self.distance = grid.int_array(-1)
+        self.next = grid.int_array(-1)
+        self.flood()
+
+    def flood(self) -> None:
+        grid = self.grid
+        distance = self.distance
+        next_cell = self.next
+        neighbors = grid.neighbors
+
+        target = grid.index(*self.target)
+        distance[target] = 0
+        next_cell[target] = target
+
+        # like for the solvers, nothing can reach a target inside a wall
+        queue = deque() if grid.walls[target] else deque([target])
+
+        while queue:
+            cell = queue.popleft()
+            new_distance = distance[cell] + 1
+            for neighbor in neighbors(cell):
+                if distance[neighbor] == -1:
+                    distance[neighbor] = new_distance
+                    next_cell[neighbor] = cell
+                    queue.append(neighbor)
+
+    # memory held by the field's arrays
+    @property
+    def nbytes(self) -> int:
+        return (len(self.distance) + len(self.next)) * self.distance.itemsize
+
+    # the path from start to the target like the solvers return it,
+    # as (x, y) tuples with start excluded and the target included
+    def path_from(self, start: tuple) -> list[tuple]:
+        grid = self.grid
+        distance = self.distance
+        cell = grid.index(*start)
+        path = []
+
+        # like for the solvers, nothing is found from a start inside a wall
+        if distance[cell] == -1 or grid.walls[cell]:
+            return None
+
+        next_cell = self.next
+        for _ in range(distance[cell]):
+            cell = next_cell[cell]
+            path.append(grid.coords(cell))
+        return path
+
+
+class DistanceFieldCache:
+
+    # distance fields by (grid, version, target), least recently used fields are
+    # dropped once the fields together hold more than max_bytes; a field is
+    # dropped as soon as the walls of its grid change
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES) -> None:
+        self.max_bytes = max_bytes
+        self.fields = OrderedDict()
+        self.nbytes = 0
+
+    def get(self, grid: Grid, target: tuple) -> DistanceField:
+        key = (grid, grid.version, target)
+        field = self.fields.get(key)
+        if field is not None:
+            self.fields.move_to_end(key)
+            return field
+
+        # fields of older versions of the grid can never be hit again
+        for old in [k for k in self.fields if k[0] is grid and k[1] != grid.version]:
+            self.remove(old)
+
+        field = DistanceField(grid, target)
+        self.fields[key] = field
+        self.nbytes += field.nbytes
+
+        # the newest field is kept even if it does not fit on its own
+        while self.nbytes > self.max_bytes and len(self.fields) > 1:
+            self.remove(next(iter(self.fields)))
+        return field
+
+    def remove(self, key: tuple) -> None:
+        self.nbytes -= self.fields.pop(key).nbytes
+
+    # the path from start to end, like the solvers return it
+    def path(self, grid: Grid, start: tuple, end: tuple) -> list[tuple]:
+        if start is None or end is None:
+            return None
+        return self.get(grid, end).path_from(start)
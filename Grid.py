@@ -0,0 +1,172 @@
+from array import array
+
+# highest traversal cost of a cell, so costs fit in the one digit of the text format
+MAX_COST = 9
+
+# version of how from_lines reads the text format, bumped whenever the same text
+# parses into a different grid, so caches of parsed mazes drop their old parses;
+# 2 reads digits as costs and gives walls and the start and end cost 1
+TEXT_VERSION = 2
+
+
+class Grid:
+
+    def __init__(self, width: int, height: int) -> None:
+        self.width = width
+        self.height = height
+        self.size = width * height
+
+        # one byte per cell, 1 if the cell is a wall
+        self.walls = bytearray(self.size)
+
+        # one byte per cell, the cost of stepping onto the cell, 1 to MAX_COST;
+        # only the weighted solvers read it, the others count every step as 1;
+        # walls and the start and end cost 1, the text format has no digit for them
+        self.costs = bytearray(b"\x01") * self.size
+
+        # start and end cells as (x, y) tuples
+        self.start: tuple = None
+        self.end: tuple = None
+
+        # connected component labels kept up to date by set_wall, see Components
+        self.components = None
+
+        # bumped whenever the walls change, so results computed for older
+        # versions of the grid can be told apart
+        self.version = 0
+
+    def index(self, x: int, y: int) -> int:
+        return y * self.width + x
+
+    def coords(self, i: int) -> tuple:
+        return i % self.width, i // self.width
+
+    def in_bounds(self, x: int, y: int) -> bool:
+        return 0 <= x < self.width and 0 <= y < self.height
+
+    def is_wall(self, x: int, y: int) -> bool:
+        return self.walls[y * self.width + x] == 1
+
+    # a new wall loses its cost, opening it again leaves it at 1
+    def set_wall(self, x: int, y: int, value: bool) -> None:
+        i = y * self.width + x
+        self.walls[i] = 1 if value else 0
+        if value:
+            self.costs[i] = 1
+        self.version += 1
+        if self.components is not None:
+            self.components.set_wall(i, value)
+
+    # costs are not part of the version, the caches keyed on it only depend on walls
+    def set_cost(self, x: int, y: int, cost: int) -> None:
+        if not 1 <= cost <= MAX_COST:
+            raise ValueError(f"cost {cost} is not between 1 and {MAX_COST}")
+        self.costs[y * self.width + x] = cost
+
+    # the cost of stepping along path, the cells after the start, like the weighted
+    # solvers count it; the same as its length on unweighted grids
+    def path_cost(self, path: list[tuple]) -> int:
+        costs = self.costs
+        width = self.width
+        return sum(costs[y * width + x] for x, y in path)
+
+    # True if any cell costs more than 1
+    @property
+    def is_weighted(self) -> bool:
+        return self.costs.count(1) != self.size
+
+    # open neighbors of cell i in left, right, top, bottom order
+    def neighbors(self, i: int) -> list[int]:
+        width = self.width
+        walls = self.walls
+        x = i % width
+        neighbors = []
+
+        if x > 0 and not walls[i - 1]:
+            neighbors.append(i - 1)
+        if x < width - 1 and not walls[i + 1]:
+            neighbors.append(i + 1)
+        if i >= width and not walls[i - width]:
+            neighbors.append(i - width)
+        if i + width < self.size and not walls[i + width]:
+            neighbors.append(i + width)
+
+        return neighbors
+
+    # allocate an int32 array with one slot per cell
+    def int_array(self, fill: int) -> array:
+        return array("i", [fill]) * self.size
+
+    def clear(self) -> None:
+        self.walls = bytearray(self.size)
+        self.costs = bytearray(b"\x01") * self.size
+        self.start = None
+        self.end = None
+        self.version += 1
+        if self.components is not None:
+            self.components.stale = True
+
+    # parse the text maze format: one line per row,
+    # "w" for walls, "s" for start, "e" for end, a digit from 1 to 9 for an open
+    # cell with that cost and anything else is open
+    @classmethod
+    def from_lines(cls, lines: list[str]) -> "Grid":
+        rows = [line.rstrip("\r\n") for line in lines]
+        while rows and rows[-1] == "":
+            rows.pop()
+
+        width = max((len(row) for row in rows), default=0)
+        grid = cls(width, len(rows))
+
+        for y, row in enumerate(rows):
+            offset = y * width
+            # walls are set in bulk by translating the row into 0/1 bytes
+            encoded = row.encode()
+            grid.walls[offset : offset + len(row)] = encoded.translate(_WALL_TABLE)
+            grid.costs[offset : offset + len(row)] = encoded.translate(_COST_TABLE)
+
+            x = row.find("s")
+            if x != -1:
+                grid.start = (x, y)
+            x = row.find("e")
+            if x != -1:
+                grid.end = (x, y)
+
+        return grid
+
+    @classmethod
+    def from_file(cls, filename: str) -> "Grid":
+        with open(filename, "r") as f:
+            return cls.from_lines(f.readlines())
+
+    def to_lines(self) -> list[str]:
+        lines = []
+        for y in range(self.height):
+            offset = y * self.width
+            walls = self.walls[offset : offset + self.width]
+            costs = self.costs[offset : offset + self.width]
+            if costs.count(1) == self.width:
+                row = bytearray(walls.translate(_CHAR_TABLE))
+            else:
+                # rows with weighted cells are written cell by cell
+                row = bytearray(
+                    _CHAR_TABLE[wall] if wall else _COST_CHAR_TABLE[cost]
+                    for wall, cost in zip(walls, costs)
+                )
+            if self.start and self.start[1] == y:
+                row[self.start[0]] = ord("s")
+            if self.end and self.end[1] == y:
+                row[self.end[0]] = ord("e")
+            lines.append(row.decode() + "\n")
+        return lines
+
+    def to_file(self, filename: str) -> None:
+        with open(filename, "w") as f:
+            f.writelines(self.to_lines())
+
+
+# byte translation tables between the text format and the wall and cost planes
+_WALL_TABLE = bytes(1 if c == ord("w") else 0 for c in range(256))
+_CHAR_TABLE = bytes(ord("w") if c == 1 else ord(".") for c in range(256))
+_COST_TABLE = bytes(c - ord("0") if ord("1") <= c <= ord("9") else 1 for c in range(256))
+_COST_CHAR_TABLE = bytes(ord("0") + c if 2 <= c <= 9 else ord(".") for c in range(256))
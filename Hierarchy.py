@@ -0,0 +1,317 @@
+import weakref
+from collections import deque
+from heapq import heappush, heappop
+
+import numpy as np
+
+from Grid import Grid
+
+# cells per side of a cluster
+CLUSTER_SIZE = 16
+
+# border segments at least this long get an entrance at both ends, shorter
+# ones a single entrance in the middle
+SPLIT_LENGTH = 6
+
+
+class Hierarchy:
+
+    # hpa*: the grid is cut into square clusters and every open stretch of the
+    # border between two clusters gets one or two entrances, pairs of cells
+    # facing each other across the border; the entrances of a cluster are joined
+    # by their distances inside it, so a search runs on the small graph of
+    # entrances and only the clusters the abstract path crosses are searched
+    # cell by cell to refine it; paths are near optimal, not always shortest
+    def __init__(self, grid: Grid, cluster_size: int = CLUSTER_SIZE) -> None:
+        self.grid = grid
+        self.cluster_size = cluster_size
+        self.clusters_x = -(-grid.width // cluster_size)
+        self.clusters_y = -(-grid.height // cluster_size)
+
+        # entrance pairs by border, a (cluster, cluster) pair in increasing order
+        self.borders = {}
+        # entrance cells by cluster, and the cells across the border of each one
+        self.nodes = {}
+        self.inter = {}
+        # distances between the entrances of a cluster: cluster -> cell -> cell -> d
+        self.intra = {}
+
+        # the walls the hierarchy was built for, to find the edited cells
+        self.version = grid.version
+        self.walls = bytes(grid.walls)
+
+        self.build(range(self.clusters_x * self.clusters_y))
+
+    def cluster(self, cell: int) -> int:
+        width = self.grid.width
+        size = self.cluster_size
+        return (cell // width) // size * self.clusters_x + (cell % width) // size
+
+    # the range of cells of cluster as (x0, y0, x1, y1)
+    def bounds(self, cluster: int) -> tuple:
+        grid = self.grid
+        size = self.cluster_size
+        x0 = cluster % self.clusters_x * size
+        y0 = cluster // self.clusters_x * size
+        return x0, y0, min(x0 + size, grid.width), min(y0 + size, grid.height)
+
+    # the clusters right of and below cluster, if there are any
+    def neighbor_clusters(self, cluster: int) -> list[int]:
+        x = cluster % self.clusters_x
+        y = cluster // self.clusters_x
+        neighbors = []
+        if x > 0:
+            neighbors.append(cluster - 1)
+        if x < self.clusters_x - 1:
+            neighbors.append(cluster + 1)
+        if y > 0:
+            neighbors.append(cluster - self.clusters_x)
+        if y < self.clusters_y - 1:
+            neighbors.append(cluster + self.clusters_x)
+        return neighbors
+
+    # rebuild the borders of clusters, the distances inside them and inside
+    # every neighboring cluster whose entrances changed with those borders
+    def build(self, clusters) -> None:
+        clusters = set(clusters)
+        borders = {
+            (min(a, b), max(a, b))
+            for a in clusters
+            for b in self.neighbor_clusters(a)
+        }
+        for border in borders:
+            self.build_border(*border)
+
+        for cluster in {c for border in borders for c in border} | clusters:
+            self.build_cluster(cluster, cluster in clusters)
+
+    # find the open stretches along the border between clusters a and b and
+    # place their entrances
+    def build_border(self, a: int, b: int) -> None:
+        grid = self.grid
+        width = grid.width
+        walls = grid.walls
+
+        for first, second in self.borders.pop((a, b), []):
+            self.inter[first].discard(second)
+            self.inter[second].discard(first)
+
+        ax0, ay0, ax1, ay1 = self.bounds(a)
+        if a // self.clusters_x == b // self.clusters_x:
+            # b is to the right, the border runs down between columns
+            pairs = [
+                (y * width + ax1 - 1, y * width + ax1) for y in range(ay0, ay1)
+            ]
+        else:
+            # b is below, the border runs along between rows
+            pairs = [
+                ((ay1 - 1) * width + x, ay1 * width + x) for x in range(ax0, ax1)
+            ]
+
+        entrances = []
+        stretch = []
+        for pair in pairs + [None]:
+            if pair is not None and not walls[pair[0]] and not walls[pair[1]]:
+                stretch.append(pair)
+                continue
+            if len(stretch) >= SPLIT_LENGTH:
+                entrances += [stretch[0], stretch[-1]]
+            elif stretch:
+                entrances.append(stretch[len(stretch) // 2])
+            stretch = []
+
+        self.borders[a, b] = entrances
+        for first, second in entrances:
+            self.inter.setdefault(first, set()).add(second)
+            self.inter.setdefault(second, set()).add(first)
+
+    # collect the entrances of cluster and the distances between them,
+    # unless its cells and its entrances are the same as before
+    def build_cluster(self, cluster: int, edited: bool = True) -> None:
+        nodes = set()
+        for neighbor in self.neighbor_clusters(cluster):
+            border = (min(cluster, neighbor), max(cluster, neighbor))
+            for pair in self.borders.get(border, []):
+                nodes.add(pair[0] if self.cluster(pair[0]) == cluster else pair[1])
+
+        if not edited and nodes == self.nodes.get(cluster):
+            return
+
+        self.nodes[cluster] = nodes
+        graph = self.local_graph(cluster)
+        self.intra[cluster] = {
+            node: {
+                other: d
+                for other, d in self.distances(graph, node).items()
+                if other in nodes and other != node
+            }
+            for node in nodes
+        }
+
+    # the open cells of cluster, their positions in that list and the positions
+    # of their open neighbors inside the cluster, searched instead of the grid
+    def local_graph(self, cluster: int) -> tuple:
+        grid = self.grid
+        width = grid.width
+        walls = grid.walls
+        x0, y0, x1, y1 = self.bounds(cluster)
+
+        cells = [
+            y * width + x
+            for y in range(y0, y1)
+            for x in range(x0, x1)
+            if not walls[y * width + x]
+        ]
+        position = {cell: i for i, cell in enumerate(cells)}
+
+        adjacent = []
+        for cell in cells:
+            x = cell % width
+            neighbors = []
+            if x > x0 and cell - 1 in position:
+                neighbors.append(position[cell - 1])
+            if x < x1 - 1 and cell + 1 in position:
+                neighbors.append(position[cell + 1])
+            if cell - width in position:
+                neighbors.append(position[cell - width])
+            if cell + width in position:
+                neighbors.append(position[cell + width])
+            adjacent.append(neighbors)
+        return cells, position, adjacent
+
+    # bfs inside a cluster's local graph from cell, return the distance and
+    # the parent of every cell it reaches as lists by position, -1 if unreached
+    def search(self, graph: tuple, cell: int) -> tuple:
+        cells, position, adjacent = graph
+        source = position[cell]
+        distance = [-1] * len(cells)
+        parent = [-1] * len(cells)
+        distance[source] = 0
+        queue = deque([source])
+        while queue:
+            current = queue.popleft()
+            next_distance = distance[current] + 1
+            for neighbor in adjacent[current]:
+                if distance[neighbor] == -1:
+                    distance[neighbor] = next_distance
+                    parent[neighbor] = current
+                    queue.append(neighbor)
+        return distance, parent
+
+    # distances from cell to the cells it reaches inside the local graph
+    def distances(self, graph: tuple, cell: int) -> dict:
+        distance, _ = self.search(graph, cell)
+        return {c: d for c, d in zip(graph[0], distance) if d != -1}
+
+    # the cells from a to b inside cluster, a excluded and b included
+    def refine(self, cluster: int, a: int, b: int) -> list[int]:
+        graph = self.local_graph(cluster)
+        cells, position, _ = graph
+        _, parent = self.search(graph, a)
+        path = []
+        current = position[b]
+        while current != position[a]:
+            path.append(cells[current])
+            current = parent[current]
+        path.reverse()
+        return path
+
+    # rebuild the clusters with cells that changed since the last build
+    def update(self) -> None:
+        grid = self.grid
+        if grid.version == self.version:
+            return
+
+        changed = np.flatnonzero(
+            np.frombuffer(grid.walls, dtype=np.uint8)
+            != np.frombuffer(self.walls, dtype=np.uint8)
+        )
+        self.version = grid.version
+        self.walls = bytes(grid.walls)
+        if len(changed):
+            self.build({self.cluster(cell) for cell in changed.tolist()})
+
+    # the path from start to end like the solvers return it: a* over the entrances,
+    # with start and end joined to the entrances of their own clusters, None like
+    # for the solvers when start or end is a wall
+    def path(self, start: tuple, end: tuple) -> list[tuple]:
+        self.update()
+        grid = self.grid
+        width = grid.width
+        start_cell = grid.index(*start)
+        end_cell = grid.index(*end)
+        if grid.walls[start_cell] or grid.walls[end_cell]:
+            return None
+        start_cluster = self.cluster(start_cell)
+        end_cluster = self.cluster(end_cell)
+        end_x, end_y = end
+
+        from_start = self.distances(self.local_graph(start_cluster), start_cell)
+        to_end = self.distances(self.local_graph(end_cluster), end_cell)
+        start_edges = {
+            node: from_start[node]
+            for node in self.nodes[start_cluster]
+            if node in from_start
+        }
+        if start_cluster == end_cluster and end_cell in from_start:
+            start_edges[end_cell] = from_start[end_cell]
+        end_nodes = self.nodes[end_cluster]
+
+        g = {start_cell: 0}
+        parent = {start_cell: start_cell}
+        closed = set()
+        open_heap = [(0, start_cell)]
+        while open_heap:
+            _, current = heappop(open_heap)
+            if current in closed:
+                continue
+            if current == end_cell:
+                break
+            closed.add(current)
+
+            if current == start_cell:
+                edges = list(start_edges.items())
+                edges += [(other, 1) for other in self.inter.get(current, ())]
+            else:
+                cluster = self.cluster(current)
+                edges = list(self.intra[cluster][current].items())
+                edges += [(other, 1) for other in self.inter.get(current, ())]
+                if current in end_nodes and current in to_end:
+                    edges.append((end_cell, to_end[current]))
+
+            for neighbor, cost in edges:
+                new_g = g[current] + cost
+                if neighbor not in g or new_g < g[neighbor]:
+                    g[neighbor] = new_g
+                    parent[neighbor] = current
+                    h = abs(neighbor % width - end_x) + abs(neighbor // width - end_y)
+                    heappush(open_heap, (new_g + h, neighbor))
+        else:
+            return None
+
+        # walk the abstract path back and refine every step inside its cluster
+        nodes = [end_cell]
+        while nodes[-1] != start_cell:
+            nodes.append(parent[nodes[-1]])
+        nodes.reverse()
+
+        cells = []
+        for a, b in zip(nodes, nodes[1:]):
+            if b in self.inter.get(a, ()) and abs(a - b) in (1, width):
+                cells.append(b)
+            elif a == start_cell:
+                cells += self.refine(start_cluster, a, b)
+            else:
+                cells += self.refine(self.cluster(b), a, b)
+        return [grid.coords(cell) for cell in cells]
+
+
+# hierarchies by grid, updated for the clusters edited since they were built
+_hierarchies = weakref.WeakKeyDictionary()
+
+
+def hierarchy(grid: Grid) -> Hierarchy:
+    cached = _hierarchies.get(grid)
+    if cached is None:
+        cached = _hierarchies[grid] = Hierarchy(grid)
+    return cached
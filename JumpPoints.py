@@ -0,0 +1,189 @@
+import copy, weakref
+
+import numpy as np
+
+from Grid import Grid
+
+
+class Jumps:
+
+    # jumps of jump point search on a 4-connected grid, where paths are made
+    # canonical by moving vertically first: a horizontal jump stops at cells
+    # where turning up or down is forced because the cell diagonally behind is
+    # a wall, and a vertical jump stops where a horizontal jump would stop,
+    # so vertical moves play the part of diagonal moves in 8-connected jps;
+    # every jump also stops at the end and returns the cell it stopped at, or -1
+    # if it hit a wall first
+    def __init__(self, grid: Grid, end: tuple) -> None:
+        self.grid = grid
+        self.end = end
+
+    def is_open(self, x: int, y: int) -> bool:
+        grid = self.grid
+        return (
+            0 <= x < grid.width
+            and 0 <= y < grid.height
+            and not grid.walls[y * grid.width + x]
+        )
+
+    # turning up or down at (x, y) is forced when moving horizontally by dx
+    def forced(self, x: int, y: int, dx: int) -> bool:
+        is_open = self.is_open
+        return (is_open(x, y - 1) and not is_open(x - dx, y - 1)) or (
+            is_open(x, y + 1) and not is_open(x - dx, y + 1)
+        )
+
+    def horizontal(self, x: int, y: int, dx: int) -> int:
+        end_x, end_y = self.end
+        while True:
+            x += dx
+            if not self.is_open(x, y):
+                return -1
+            if (x == end_x and y == end_y) or self.forced(x, y, dx):
+                return y * self.grid.width + x
+
+    def vertical(self, x: int, y: int, dy: int) -> int:
+        end_x, end_y = self.end
+        while True:
+            y += dy
+            if not self.is_open(x, y):
+                return -1
+            if (
+                (x == end_x and y == end_y)
+                or self.horizontal(x, y, -1) != -1
+                or self.horizontal(x, y, 1) != -1
+            ):
+                return y * self.grid.width + x
+
+
+class JumpTables(Jumps):
+
+    # jps+: the same jumps answered from tables precomputed once per grid, for
+    # every cell and direction the distance to the cell a jump stops at and the
+    # number of open cells before a wall, negative jump distances mean the
+    # jump hits a wall; only the stops at the end are worked out per query
+    def __init__(self, grid: Grid) -> None:
+        super().__init__(grid, None)
+        self.version = grid.version
+
+        # by direction, -1 or 1
+        self.jump_x = {}
+        self.free_x = {}
+        self.jump_y = {}
+        self.free_y = {}
+        self.build()
+
+    # scan every row and column against each direction, counting the open cells
+    # ahead and the distance to the next cell a jump would stop at
+    def build(self) -> None:
+        grid = self.grid
+        width = grid.width
+        height = grid.height
+        walls = grid.walls
+
+        # open cells with a wall border around them, so that the cells behind and
+        # beside every cell of the grid can be looked up with shifted slices
+        is_open = np.zeros((height + 2, width + 2), dtype=bool)
+        is_open[1:-1, 1:-1] = np.frombuffer(walls, dtype=np.uint8).reshape(
+            height, width
+        ) == 0
+        above = is_open[:-2]
+        below = is_open[2:]
+
+        for dx in (-1, 1):
+            # the forced cells of horizontal jumps by dx, like Jumps.forced
+            behind = slice(1 - dx, width + 1 - dx)
+            here = slice(1, width + 1)
+            forced = (above[:, here] & ~above[:, behind]) | (
+                below[:, here] & ~below[:, behind]
+            )
+            forced = forced.tobytes()
+            self.jump_x[dx], self.free_x[dx] = self.scan(forced, 1, width, dx)
+
+        # a vertical jump stops where either horizontal jump does
+        stops = (
+            (np.frombuffer(self.jump_x[-1], dtype=np.int32) > 0)
+            | (np.frombuffer(self.jump_x[1], dtype=np.int32) > 0)
+        ).tobytes()
+        for dy in (-1, 1):
+            self.jump_y[dy], self.free_y[dy] = self.scan(stops, width, height, dy)
+
+    # jump and free run lengths of every cell for jumps by direction along lines
+    # of length cells step apart, stopping at the cells set in stops
+    def scan(self, stops: bytes, step: int, length: int, direction: int) -> tuple:
+        grid = self.grid
+        walls = grid.walls
+        jumps = grid.int_array(0)
+        free = grid.int_array(0)
+
+        # lines run along rows when step is 1 and along columns otherwise
+        line_step = grid.width if step == 1 else 1
+        lines = grid.size // length if length else 0
+        positions = range(length - 1, -1, -1) if direction == 1 else range(length)
+
+        for line in range(lines):
+            first = line * line_step
+            run = 0
+            jump = 0
+            for position in positions:
+                cell = first + position * step
+                free[cell] = run
+                jumps[cell] = jump if jump else -run
+                if walls[cell]:
+                    run = 0
+                    jump = 0
+                else:
+                    run += 1
+                    if stops[cell]:
+                        jump = 1
+                    elif jump:
+                        jump += 1
+
+        return jumps, free
+
+    def horizontal(self, x: int, y: int, dx: int) -> int:
+        cell = y * self.grid.width + x
+        jump = self.jump_x[dx][cell]
+
+        # the end is ahead in the row, before any wall and any other stop
+        end_x, end_y = self.end
+        distance = (end_x - x) * dx
+        if end_y == y and 0 < distance <= self.free_x[dx][cell]:
+            if jump <= 0 or distance <= jump:
+                return cell + distance * dx
+
+        return cell + jump * dx if jump > 0 else -1
+
+    def vertical(self, x: int, y: int, dy: int) -> int:
+        width = self.grid.width
+        cell = y * width + x
+        jump = self.jump_y[dy][cell]
+
+        # the row of the end is ahead, before any wall and any other stop, and
+        # the end is in this column or can be reached along that row
+        end_x, end_y = self.end
+        distance = (end_y - y) * dy
+        if 0 < distance <= self.free_y[dy][cell] and (jump <= 0 or distance < jump):
+            row_cell = cell + distance * dy * width
+            if end_x == x:
+                return row_cell
+            dx = 1 if end_x > x else -1
+            if (end_x - x) * dx <= self.free_x[dx][row_cell]:
+                return row_cell
+
+        return cell + jump * dy * width if jump > 0 else -1
+
+
+# jump tables by grid, rebuilt when the walls of the grid change
+_tables = weakref.WeakKeyDictionary()
+
+
+# the jump tables of grid for a search to end, sharing the cached tables
+def jump_tables(grid: Grid, end: tuple) -> JumpTables:
+    tables = _tables.get(grid)
+    if tables is None or tables.version != grid.version:
+        tables = _tables[grid] = JumpTables(grid)
+
+    tables = copy.copy(tables)
+    tables.end = end
+    return tables
@@ -0,0 +1,164 @@
+from array import array
+from heapq import heappush, heappop
+
+from Algorithms import PATH, PUSH, VISIT
+from Grid import Grid
+from SearchContext import SearchContext, begin_search
+
+# distance of cells that cannot be reached (yet)
+INFINITY = 2**30
+
+
+class LifelongPlanner:
+
+    # lifelong planning a* between a fixed start and end: g is the distance from
+    # the start found so far and rhs the one step lookahead from the neighbors'
+    # g, cells where they differ are inconsistent and wait in the open list;
+    # after walls change only the changed cells are made inconsistent, so
+    # planning again repairs the search tree around them instead of starting over
+    def __init__(
+        self, grid: Grid, start: tuple, end: tuple, context: SearchContext = None
+    ) -> None:
+        self.grid = grid
+        self.start = grid.index(*start)
+        self.end = grid.index(*end)
+        self.end_x, self.end_y = end
+        self.context = context
+
+        self.g = array("i", [INFINITY]) * grid.size
+        self.rhs = array("i", [INFINITY]) * grid.size
+
+        # heap of (k1, k2, cell) entries and the current key of every queued cell,
+        # entries whose key is not the current one are skipped
+        self.open_heap = []
+        self.keys = {}
+
+        self.rhs[self.start] = 0
+        self.push(self.start)
+
+    def key(self, cell: int) -> tuple:
+        width = self.grid.width
+        k2 = min(self.g[cell], self.rhs[cell])
+        h = abs(cell % width - self.end_x) + abs(cell // width - self.end_y)
+        return k2 + h, k2
+
+    def push(self, cell: int) -> None:
+        key = self.key(cell)
+        self.keys[cell] = key
+        heappush(self.open_heap, (*key, cell))
+
+    # the lowest current key in the open list, None if it is empty
+    def top_key(self) -> tuple:
+        open_heap = self.open_heap
+        keys = self.keys
+        while open_heap:
+            k1, k2, cell = open_heap[0]
+            if keys.get(cell) == (k1, k2):
+                return k1, k2
+            heappop(open_heap)
+        return None
+
+    # recompute the lookahead of cell and queue it if it is inconsistent,
+    # return True if it was queued
+    def update(self, cell: int) -> bool:
+        grid = self.grid
+        g = self.g
+        if cell != self.start:
+            if grid.walls[cell]:
+                self.rhs[cell] = INFINITY
+            else:
+                best = min((g[n] for n in grid.neighbors(cell)), default=INFINITY)
+                self.rhs[cell] = min(best + 1, INFINITY)
+
+        self.keys.pop(cell, None)
+        if g[cell] != self.rhs[cell]:
+            self.push(cell)
+            return True
+        return False
+
+    # the walls of cells have changed
+    def update_walls(self, cells) -> None:
+        neighbors = self.grid.neighbors
+        for cell in cells:
+            self.update(cell)
+            for neighbor in neighbors(cell):
+                self.update(neighbor)
+
+    # expand inconsistent cells until the end is consistent and no queued cell
+    # could still shorten its path, then walk the path back from the end
+    # yielding a step event for every visited, pushed and path cell
+    # return the cells as a list that are in the path
+    def plan_steps(self):
+        grid = self.grid
+        g = self.g
+        rhs = self.rhs
+        keys = self.keys
+        neighbors = grid.neighbors
+        end = self.end
+
+        context = self.context = begin_search(grid, self.context)
+        generation = context.generation
+        seen = context.seen
+        closed = context.closed
+
+        # like the other solvers, nothing is found from or to a wall, the
+        # queued cells wait for the walls to change again
+        if grid.walls[self.start] or grid.walls[end]:
+            return None
+
+        while True:
+            top = self.top_key()
+            if top is None or (top >= self.key(end) and rhs[end] == g[end]):
+                break
+
+            _, _, cell = heappop(self.open_heap)
+            del keys[cell]
+            closed[cell] = generation
+            yield VISIT, cell
+
+            if g[cell] > rhs[cell]:
+                # the cell got closer, its neighbors may too
+                g[cell] = rhs[cell]
+            else:
+                # the cell got further away, so it and its neighbors are redone
+                g[cell] = INFINITY
+                if self.update(cell):
+                    seen[cell] = generation
+
+            for neighbor in neighbors(cell):
+                if self.update(neighbor):
+                    seen[neighbor] = generation
+                    yield PUSH, neighbor
+
+        if g[end] >= INFINITY:
+            return None
+        return (yield from self.path_steps())
+
+    # follow the neighbors one step closer to the start back from the end,
+    # mark the cells as path and return the path like Algorithms.path_steps
+    def path_steps(self):
+        grid = self.grid
+        g = self.g
+        on_path = self.context.on_path
+        generation = self.context.generation
+
+        path = []
+        current = self.end
+        while current != self.start:
+            on_path[current] = generation
+            path.append(grid.coords(current))
+            yield PATH, current
+            current = min(grid.neighbors(current), key=g.__getitem__)
+
+        path.reverse()
+        return path
+
+
+# plan from scratch with a new planner, like the other solvers' step generators
+def lpa_star_steps(
+    grid: Grid, start: tuple, end: tuple, context: SearchContext = None
+):
+    # check if start and end are valid
+    if start is None or end is None:
+        return None
+    return (yield from LifelongPlanner(grid, start, end, context).plan_steps())
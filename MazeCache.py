@@ -0,0 +1,114 @@
+import hashlib, json, os
+
+from Grid import TEXT_VERSION, Grid
+from MazeFile import BINARY_EXTENSION, is_binary, read_binary, write_binary
+
+DEFAULT_DIRECTORY = os.path.join(
+    os.path.expanduser("~"), ".cache", "pathfinding-visualizer"
+)
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+
+class MazeCache:
+
+    # on-disk cache of parsed text mazes stored in the binary format
+    # cached mazes are named by the hash of the text they were parsed from and
+    # index.json maps "path|size|mtime|version" keys to those hashes, so a warm
+    # lookup is a stat and an mmap load and an unchanged file under a new path or
+    # mtime only costs a hash; the hashes and keys include Grid.TEXT_VERSION, so
+    # mazes parsed by an older parser are never served; least recently used mazes
+    # are evicted above max_bytes
+    def __init__(
+        self, directory: str = None, max_bytes: int = DEFAULT_MAX_BYTES
+    ) -> None:
+        self.directory = directory or os.environ.get(
+            "PATHFINDING_CACHE", DEFAULT_DIRECTORY
+        )
+        self.max_bytes = max_bytes
+        self.index_file = os.path.join(self.directory, "index.json")
+
+    def read_index(self) -> dict:
+        try:
+            with open(self.index_file, "r") as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    def write_index(self, index: dict) -> None:
+        # replace the index atomically, other processes may be reading it
+        tmp = f"{self.index_file}.{os.getpid()}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(index, f)
+        os.replace(tmp, self.index_file)
+
+    def path(self, digest: str) -> str:
+        return os.path.join(self.directory, digest + BINARY_EXTENSION)
+
+    # load a cached maze and mark it as recently used, None if it is missing
+    def get(self, digest: str) -> Grid:
+        path = self.path(digest)
+        try:
+            grid = read_binary(path)
+        except (FileNotFoundError, ValueError):
+            return None
+        os.utime(path)
+        return grid
+
+    def load(self, filename: str) -> Grid:
+        # binary mazes are already as fast to load as the cache
+        if is_binary(filename):
+            return read_binary(filename)
+
+        stat = os.stat(filename)
+        path = os.path.abspath(filename)
+        key = f"{path}|{stat.st_size}|{stat.st_mtime_ns}|{TEXT_VERSION}"
+
+        index = self.read_index()
+        if key in index:
+            grid = self.get(index[key])
+            if grid is not None:
+                return grid
+
+        # the file is new or changed, it only has to be parsed if its text is
+        with open(filename, "rb") as f:
+            data = f.read()
+        digest = hashlib.sha256(b"%d|" % TEXT_VERSION + data).hexdigest()
+
+        grid = self.get(digest)
+        if grid is None:
+            grid = Grid.from_lines(data.decode().splitlines())
+            os.makedirs(self.directory, exist_ok=True)
+            tmp = f"{self.path(digest)}.{os.getpid()}.tmp"
+            write_binary(grid, tmp)
+            os.replace(tmp, self.path(digest))
+
+        # forget older versions of this file and keys of older parsers, which
+        # have one part less
+        for old in [k for k in index if k.rsplit("|", 3)[0] == path]:
+            del index[old]
+        index[key] = digest
+
+        self.evict(index)
+        self.write_index(index)
+        return grid
+
+    # delete the least recently used mazes until the cache fits in max_bytes
+    def evict(self, index: dict) -> None:
+        entries = []
+        with os.scandir(self.directory) as it:
+            for entry in it:
+                if entry.name.endswith(BINARY_EXTENSION):
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime, stat.st_size, entry.name))
+
+        total = sum(size for _, size, _ in entries)
+        evicted = set()
+        for _, size, name in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            os.remove(os.path.join(self.directory, name))
+            evicted.add(name[: -len(BINARY_EXTENSION)])
+            total -= size
+
+        for key in [k for k, digest in index.items() if digest in evicted]:
+            del index[key]
@@ -0,0 +1,102 @@
+import mmap, struct
+
+import numpy as np
+
+from Grid import Grid
+
+# binary maze format, little endian:
+#   magic b"MAZE", version u16, flags u16, width u32, height u32,
+#   start x/y i32, end x/y i32 (-1 when not set),
+#   then one bit per cell in row-major order, most significant bit first, 1 for walls,
+#   then with FLAG_COSTS one byte per cell in row-major order, the cost of the cell
+MAGIC = b"MAZE"
+VERSION = 1
+HEADER = struct.Struct("<4sHHIIiiii")
+
+# flags
+FLAG_COSTS = 1
+
+# extension of binary maze files, everything else is read and written as text
+BINARY_EXTENSION = ".bmaze"
+
+
+def is_binary(filename: str) -> bool:
+    return filename.endswith(BINARY_EXTENSION)
+
+
+def _point(x: int, y: int) -> tuple:
+    return None if x < 0 else (x, y)
+
+
+# load a binary maze through mmap, so the header and the wall plane are read
+# straight from the mapped file and the bits are unpacked in one vectorized pass
+def read_binary(filename: str) -> Grid:
+    with open(filename, "rb") as f:
+        return _read_mapped(filename, f)
+
+
+def _read_mapped(filename: str, f) -> Grid:
+    with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as m:
+        if len(m) < HEADER.size:
+            raise ValueError(f"{filename} is too short to be a binary maze")
+
+        magic, version, flags, width, height, sx, sy, ex, ey = HEADER.unpack_from(m)
+        if magic != MAGIC:
+            raise ValueError(f"{filename} is not a binary maze")
+        if version != VERSION:
+            raise ValueError(f"{filename} has unsupported version {version}")
+
+        size = width * height
+        plane = (size + 7) // 8
+        costs = size if flags & FLAG_COSTS else 0
+        if len(m) < HEADER.size + plane + costs:
+            raise ValueError(f"{filename} is truncated")
+
+        bits = np.frombuffer(m, dtype=np.uint8, count=plane, offset=HEADER.size)
+        walls = np.unpackbits(bits, count=size)
+
+        grid = Grid(width, height)
+        grid.walls[:] = walls.data
+        if costs:
+            offset = HEADER.size + plane
+            grid.costs[:] = m[offset : offset + costs]
+        # drop the view before the map is closed
+        del bits
+
+    grid.start = _point(sx, sy)
+    grid.end = _point(ex, ey)
+    return grid
+
+
+def write_binary(grid: Grid, filename: str) -> None:
+    start = grid.start or (-1, -1)
+    end = grid.end or (-1, -1)
+    # unweighted grids leave out the cost plane
+    flags = FLAG_COSTS if grid.is_weighted else 0
+    header = HEADER.pack(MAGIC, VERSION, flags, grid.width, grid.height, *start, *end)
+    bits = np.packbits(np.frombuffer(grid.walls, dtype=np.uint8))
+
+    with open(filename, "wb") as f:
+        f.write(header)
+        f.write(bits.tobytes())
+        if flags & FLAG_COSTS:
+            f.write(grid.costs)
+
+
+# read or write a maze in the format given by its extension
+def read_maze(filename: str) -> Grid:
+    if is_binary(filename):
+        return read_binary(filename)
+    return Grid.from_file(filename)
+
+
+def write_maze(grid: Grid, filename: str) -> None:
+    if is_binary(filename):
+        write_binary(grid, filename)
+    else:
+        grid.to_file(filename)
+
+
+# convert a maze between the text and binary formats, by extension
+def convert(source: str, destination: str) -> None:
+    write_maze(read_maze(source), destination)
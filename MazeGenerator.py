@@ -0,0 +1,165 @@
+import random
+
+import numpy as np
+
+from Grid import Grid
+
+# edges of perfect mazes are joined in chunks so the shuffled edge arrays are
+# never turned into python lists all at once
+CHUNK_SIZE = 1 << 16
+
+
+# copy a [height, width] uint8 wall array into the grid's wall plane in one write
+def _set_walls(grid: Grid, walls: np.ndarray) -> None:
+    grid.walls[:] = walls.astype(np.uint8).tobytes()
+
+
+# uniform noise: every cell is a wall with probability density, drawn in one
+# vectorized call, with the start and end on two distinct open cells
+def noise_maze(
+    width: int, height: int, seed: int = None, density: float = 0.3
+) -> Grid:
+    rng = np.random.default_rng(seed)
+    walls = rng.random((height, width)) < density
+
+    grid = Grid(width, height)
+    if grid.size >= 2:
+        start, end = rng.choice(grid.size, 2, replace=False).tolist()
+        walls.flat[[start, end]] = False
+        grid.start = grid.coords(start)
+        grid.end = grid.coords(end)
+
+    _set_walls(grid, walls)
+    return grid
+
+
+# perfect mazes are carved on the lattice of cells at even coordinates, every
+# other cell starts as a wall and carving a passage opens the cell between two
+# lattice cells; the start is the top left and the end the bottom right lattice cell
+def _lattice(width: int, height: int) -> tuple:
+    return (width + 1) // 2, (height + 1) // 2
+
+
+def _carve(width: int, height: int, passages: list) -> Grid:
+    walls = np.ones((height, width), dtype=np.uint8)
+    walls[0::2, 0::2] = 0
+    walls.flat[passages] = 0
+
+    grid = Grid(width, height)
+    _set_walls(grid, walls)
+
+    lattice_width, lattice_height = _lattice(width, height)
+    grid.start = (0, 0)
+    grid.end = (2 * (lattice_width - 1), 2 * (lattice_height - 1))
+    return grid
+
+
+# recursive backtracker, run iteratively with an explicit stack
+def backtracker_maze(
+    width: int, height: int, seed: int = None, density: float = None
+) -> Grid:
+    rng = random.Random(seed)
+    lattice_width, lattice_height = _lattice(width, height)
+    visited = bytearray(lattice_width * lattice_height)
+    passages = []
+
+    visited[0] = 1
+    stack = [0]
+    while stack:
+        cell = stack[-1]
+        x = cell % lattice_width
+        y = cell // lattice_width
+
+        options = []
+        if x > 0 and not visited[cell - 1]:
+            options.append(cell - 1)
+        if x < lattice_width - 1 and not visited[cell + 1]:
+            options.append(cell + 1)
+        if y > 0 and not visited[cell - lattice_width]:
+            options.append(cell - lattice_width)
+        if y < lattice_height - 1 and not visited[cell + lattice_width]:
+            options.append(cell + lattice_width)
+
+        if not options:
+            stack.pop()
+            continue
+
+        neighbor = options[rng.randrange(len(options))]
+        visited[neighbor] = 1
+        stack.append(neighbor)
+
+        # the open cell between the two lattice cells, in grid coordinates
+        nx = neighbor % lattice_width
+        ny = neighbor // lattice_width
+        passages.append((y + ny) * width + x + nx)
+
+    return _carve(width, height, passages)
+
+
+# randomized kruskal: every edge between neighboring lattice cells is shuffled in
+# one vectorized permutation and joined when it connects two different trees,
+# tracked with a union-find forest using path halving
+def kruskal_maze(
+    width: int, height: int, seed: int = None, density: float = None
+) -> Grid:
+    rng = np.random.default_rng(seed)
+    lattice_width, lattice_height = _lattice(width, height)
+    cells = np.arange(lattice_width * lattice_height).reshape(
+        lattice_height, lattice_width
+    )
+
+    # each edge is (lattice cell, lattice cell, grid index of the cell between them)
+    xs = np.arange(lattice_width)
+    ys = np.arange(lattice_height)
+    horizontal = (
+        cells[:, :-1].ravel(),
+        cells[:, 1:].ravel(),
+        (2 * ys[:, None] * width + 2 * xs[None, :-1] + 1).ravel(),
+    )
+    vertical = (
+        cells[:-1, :].ravel(),
+        cells[1:, :].ravel(),
+        ((2 * ys[:-1, None] + 1) * width + 2 * xs[None, :]).ravel(),
+    )
+    order = rng.permutation(len(horizontal[0]) + len(vertical[0]))
+    a, b, between = (
+        np.concatenate((h, v))[order] for h, v in zip(horizontal, vertical)
+    )
+
+    parent = list(range(lattice_width * lattice_height))
+    passages = []
+    for offset in range(0, len(order), CHUNK_SIZE):
+        chunk = slice(offset, offset + CHUNK_SIZE)
+        edges = zip(a[chunk].tolist(), b[chunk].tolist(), between[chunk].tolist())
+        for u, v, cell in edges:
+            while parent[u] != u:
+                parent[u] = parent[parent[u]]
+                u = parent[u]
+            while parent[v] != v:
+                parent[v] = parent[parent[v]]
+                v = parent[v]
+            if u != v:
+                parent[u] = v
+                passages.append(cell)
+
+    return _carve(width, height, passages)
+
+
+# random terrain: every open cell but the start and end costs 1 to max_cost, drawn
+# in one vectorized call from a stream of its own so the same seed still gives the
+# same walls
+def add_terrain(grid: Grid, max_cost: int, seed: int = None) -> None:
+    rng = np.random.default_rng(None if seed is None else (seed, 1))
+    costs = rng.integers(1, max_cost, size=grid.size, endpoint=True, dtype=np.uint8)
+    costs[np.frombuffer(grid.walls, dtype=np.uint8) == 1] = 1
+    for point in (grid.start, grid.end):
+        if point is not None:
+            costs[grid.index(*point)] = 1
+    grid.costs[:] = costs.tobytes()
+
+
+GENERATORS = {
+    "noise": noise_maze,
+    "backtracker": backtracker_maze,
+    "kruskal": kruskal_maze,
+}
@@ -0,0 +1,109 @@
+import numpy as np
+import pygame
+
+from Block import Block
+from Grid import Grid
+from SearchContext import SearchContext
+from Viewport import Viewport
+
+
+class PixelRenderer:
+
+    # cell states, each one is an index into the palette
+    EMPTY = 0
+    WALL = 1
+    START = 2
+    END = 3
+    CHECKED = 4
+    PATH = 5
+    # open cells costing more than 1, TERRAIN + cost - 2
+    TERRAIN = 6
+
+    PALETTE = [
+        Block.WHITE,
+        Block.BLACK,
+        Block.GREEN,
+        Block.ORANGE,
+        Block.YELLOW,
+        Block.PURPLE,
+    ] + Block.TERRAIN[1:]
+
+    # draws the visible part of the grid as one pixel per cell through an 8-bit
+    # palette surface scaled to the viewport, so the cost of a frame depends on
+    # the number of visible cells and not on the size of the grid
+    def __init__(self, grid: Grid, context: SearchContext, viewport: Viewport) -> None:
+        self.grid = grid
+        self.context = context
+        self.viewport = viewport
+
+        # palette surface for the visible cells, rebuilt when their number changes
+        self.surface = None
+
+        # last scaled image of the visible cells and where it was drawn
+        self.image = None
+        self.position = None
+
+    # state of the cells in the range (x0, y0, x1, y1) as a uint8 array indexed [y, x]
+    def visible_state(self, x0: int, y0: int, x1: int, y1: int) -> np.ndarray:
+        grid = self.grid
+        context = self.context
+        generation = context.generation
+        shape = (grid.height, grid.width)
+        area = (slice(y0, y1), slice(x0, x1))
+
+        # view the grid and context arrays without copying them
+        walls = np.frombuffer(grid.walls, dtype=np.uint8).reshape(shape)[area]
+        seen = np.frombuffer(context.seen, dtype=np.int32).reshape(shape)[area]
+        closed = np.frombuffer(context.closed, dtype=np.int32).reshape(shape)[area]
+        on_path = np.frombuffer(context.on_path, dtype=np.int32).reshape(shape)[area]
+        costs = np.frombuffer(grid.costs, dtype=np.uint8).reshape(shape)[area]
+
+        # assign in increasing priority, the same order Block.select_color uses
+        state = np.where(costs > 1, costs + (PixelRenderer.TERRAIN - 2), 0)
+        state = state.astype(np.uint8)
+        state[(seen == generation) | (closed == generation)] = PixelRenderer.CHECKED
+        reverse = context.reverse
+        if reverse is not None:
+            seen = np.frombuffer(reverse.seen, dtype=np.int32).reshape(shape)[area]
+            closed = np.frombuffer(reverse.closed, dtype=np.int32).reshape(shape)[area]
+            state[(seen == generation) | (closed == generation)] = PixelRenderer.CHECKED
+        state[on_path == generation] = PixelRenderer.PATH
+        ends = ((grid.end, PixelRenderer.END), (grid.start, PixelRenderer.START))
+        for cell, value in ends:
+            if cell and x0 <= cell[0] < x1 and y0 <= cell[1] < y1:
+                state[cell[1] - y0, cell[0] - x0] = value
+        state[walls == 1] = PixelRenderer.WALL
+        return state
+
+    def draw(self, window: pygame.Surface) -> None:
+        viewport = self.viewport
+        x0, y0, x1, y1 = viewport.visible_cells()
+
+        size = (x1 - x0, y1 - y0)
+        if self.surface is None or self.surface.get_size() != size:
+            self.surface = pygame.Surface(size, depth=8)
+            self.surface.set_palette(PixelRenderer.PALETTE)
+
+        # surfarray indexes surfaces as [x, y]
+        state = self.visible_state(x0, y0, x1, y1)
+        pygame.surfarray.blit_array(self.surface, state.T)
+
+        # scale the visible cells to their size on screen, clipped to the viewport
+        left, top = viewport.to_screen(x0, y0)
+        right, bottom = viewport.to_screen(x1, y1)
+        self.position = (round(left), round(top))
+        size = (round(right) - self.position[0], round(bottom) - self.position[1])
+        self.image = pygame.transform.scale(self.surface, size)
+        window.set_clip(viewport.rect)
+        window.blit(self.image, self.position)
+        window.set_clip(None)
+
+    # repaint part of the window from the last image without updating it
+    def draw_area(self, window: pygame.Surface, area: pygame.Rect) -> None:
+        if self.image is None:
+            self.draw(window)
+            return
+
+        window.set_clip(area.clip(self.viewport.rect))
+        window.blit(self.image, self.position)
+        window.set_clip(None)
@@ -0,0 +1,267 @@
+from array import array
+from heapq import heappush, heappop
+from itertools import count
+
+
+class PriorityQueue:
+
+    # frontier of a search over the cells of a grid: push queues an item with an
+    # integer key or lowers the key it is queued with, pop takes the item with the
+    # lowest key; lazy queues keep the old entry of an item pushed again and hand
+    # it out later, so solvers skip items they have already closed
+    # monotone queues only take keys no lower than the last one popped
+    monotone = False
+
+    def __init__(self, size: int) -> None:
+        self.size = size
+
+    def __len__(self) -> int:
+        raise NotImplementedError
+
+    def push(self, key: int, item: int) -> None:
+        raise NotImplementedError
+
+    # the (key, item) with the lowest key
+    def pop(self) -> tuple:
+        raise NotImplementedError
+
+
+class HeapQueue(PriorityQueue):
+
+    # lazy binary heap on heapq of (key, counter, item) entries, the counter breaks
+    # ties first in first out and keeps items from being compared
+    def __init__(self, size: int) -> None:
+        super().__init__(size)
+        self.heap = []
+        self.counter = count()
+
+    def __len__(self) -> int:
+        return len(self.heap)
+
+    def push(self, key: int, item: int) -> None:
+        heappush(self.heap, (key, next(self.counter), item))
+
+    def pop(self) -> tuple:
+        key, _, item = heappop(self.heap)
+        return key, item
+
+
+class IndexedHeap(PriorityQueue):
+
+    # binary heap with the position of every item in it, so pushing a queued
+    # item again sifts its entry up instead of adding a stale one
+    def __init__(self, size: int) -> None:
+        super().__init__(size)
+        self.keys = []
+        self.items = []
+        # -1 for items that are not queued
+        self.position = array("i", [-1]) * size
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def push(self, key: int, item: int) -> None:
+        i = self.position[item]
+        if i == -1:
+            i = len(self.items)
+            self.keys.append(key)
+            self.items.append(item)
+        elif key >= self.keys[i]:
+            return
+        self.sift_up(i, key, item)
+
+    def pop(self) -> tuple:
+        keys = self.keys
+        items = self.items
+        key = keys[0]
+        item = items[0]
+        self.position[item] = -1
+
+        last_key = keys.pop()
+        last_item = items.pop()
+        if items:
+            self.sift_down(0, last_key, last_item)
+        return key, item
+
+    # move the entry at i up until its parent's key is not higher than key
+    def sift_up(self, i: int, key: int, item: int) -> None:
+        keys = self.keys
+        items = self.items
+        position = self.position
+        while i > 0:
+            parent = (i - 1) >> 1
+            if keys[parent] <= key:
+                break
+            keys[i] = keys[parent]
+            items[i] = items[parent]
+            position[items[i]] = i
+            i = parent
+        keys[i] = key
+        items[i] = item
+        position[item] = i
+
+    # move the entry at i down until no child has a lower key than key
+    def sift_down(self, i: int, key: int, item: int) -> None:
+        keys = self.keys
+        items = self.items
+        position = self.position
+        n = len(items)
+        while True:
+            child = 2 * i + 1
+            if child >= n:
+                break
+            if child + 1 < n and keys[child + 1] < keys[child]:
+                child += 1
+            if keys[child] >= key:
+                break
+            keys[i] = keys[child]
+            items[i] = items[child]
+            position[items[i]] = i
+            i = child
+        keys[i] = key
+        items[i] = item
+        position[item] = i
+
+
+class PairingNode:
+
+    __slots__ = ("key", "item", "child", "sibling", "prev")
+
+    # prev is the left sibling, or the parent of a first child
+    def __init__(self, key: int, item: int) -> None:
+        self.key = key
+        self.item = item
+        self.child = None
+        self.sibling = None
+        self.prev = None
+
+
+class PairingHeap(PriorityQueue):
+
+    # pairing heap: a tree whose root has the lowest key, pushes and key decreases
+    # are O(1) links of a subtree to the root and pop pairs up the root's
+    # children in two passes
+    def __init__(self, size: int) -> None:
+        super().__init__(size)
+        self.root = None
+        self.count = 0
+        # the node of every queued item
+        self.nodes = {}
+
+    def __len__(self) -> int:
+        return self.count
+
+    @staticmethod
+    def link(a: PairingNode, b: PairingNode) -> PairingNode:
+        # make the root with the higher key the first child of the other
+        if b.key < a.key:
+            a, b = b, a
+        first = a.child
+        b.prev = a
+        b.sibling = first
+        if first is not None:
+            first.prev = b
+        a.child = b
+        return a
+
+    def push(self, key: int, item: int) -> None:
+        node = self.nodes.get(item)
+        if node is None:
+            node = self.nodes[item] = PairingNode(key, item)
+            self.count += 1
+        elif key >= node.key:
+            return
+        else:
+            node.key = key
+            if node is self.root:
+                return
+
+            # cut the node's subtree out of the tree to link it to the root again
+            prev = node.prev
+            if prev.child is node:
+                prev.child = node.sibling
+            else:
+                prev.sibling = node.sibling
+            if node.sibling is not None:
+                node.sibling.prev = prev
+            node.sibling = None
+            node.prev = None
+
+        self.root = node if self.root is None else self.link(self.root, node)
+
+    def pop(self) -> tuple:
+        root = self.root
+        del self.nodes[root.item]
+        self.count -= 1
+
+        # link the children in pairs from left to right, then the pairs from right to left
+        pairs = []
+        child = root.child
+        while child is not None:
+            second = child.sibling
+            child.prev = child.sibling = None
+            if second is None:
+                pairs.append(child)
+                break
+            rest = second.sibling
+            second.prev = second.sibling = None
+            pairs.append(self.link(child, second))
+            child = rest
+
+        new_root = pairs.pop() if pairs else None
+        while pairs:
+            new_root = self.link(pairs.pop(), new_root)
+        self.root = new_root
+        return root.key, root.item
+
+
+class RadixHeap(PriorityQueue):
+
+    # lazy monotone radix heap: bucket i holds the entries whose key differs from
+    # the last popped key first in bit i - 1, so bucket 0 holds keys equal to it;
+    # when bucket 0 runs empty the first non-empty bucket is spread out again
+    # around its lowest key, and every entry moves to a lower bucket each time
+    monotone = True
+
+    def __init__(self, size: int) -> None:
+        super().__init__(size)
+        self.buckets = [[]]
+        self.last = 0
+        self.count = 0
+
+    def __len__(self) -> int:
+        return self.count
+
+    def push(self, key: int, item: int) -> None:
+        if key < self.last:
+            raise ValueError(f"key {key} is lower than the last popped key {self.last}")
+        i = (key ^ self.last).bit_length()
+        buckets = self.buckets
+        while len(buckets) <= i:
+            buckets.append([])
+        buckets[i].append((key, item))
+        self.count += 1
+
+    def pop(self) -> tuple:
+        buckets = self.buckets
+        if not buckets[0]:
+            i = 1
+            while not buckets[i]:
+                i += 1
+            entries = buckets[i]
+            buckets[i] = []
+            last = self.last = min(entries)[0]
+            for entry in entries:
+                buckets[(entry[0] ^ last).bit_length()].append(entry)
+
+        self.count -= 1
+        return buckets[0].pop()
+
+
+# priority queues by the name used in the cli
+QUEUES = {
+    "heapq": HeapQueue,
+    "indexed": IndexedHeap,
+    "pairing": PairingHeap,
+    "radix": RadixHeap,
+}
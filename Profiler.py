@@ -0,0 +1,98 @@
+import cProfile, os, pstats, sys, threading, time
+from collections import Counter
+
+# seconds between two stack samples, and the least time a call is sampled for,
+# repeating it if it finishes sooner
+SAMPLE_INTERVAL = 0.001
+SAMPLE_SECONDS = 1.0
+
+
+# run fn under cProfile, return its result and the profile statistics
+def profile_calls(fn) -> tuple:
+    profiler = cProfile.Profile()
+    result = profiler.runcall(fn)
+    return result, pstats.Stats(profiler)
+
+
+# the functions that spent the most time in their own code as
+# (self seconds, total seconds, calls, "name (file:line)") tuples
+def top_functions(stats: pstats.Stats, count: int = 10) -> list[tuple]:
+    rows = [
+        (tottime, cumtime, calls, f"{name} ({os.path.basename(filename)}:{line})")
+        for (filename, line, name), (_, calls, tottime, cumtime, _) in stats.stats.items()
+    ]
+    rows.sort(reverse=True)
+    return rows[:count]
+
+
+class StackSampler(threading.Thread):
+
+    # samples the call stack of one thread every interval from a background
+    # thread and counts every distinct stack, root first, in the collapsed form
+    # flamegraph tools read; frames from below the sampled call are left out
+    def __init__(self, thread_id: int, interval: float = SAMPLE_INTERVAL) -> None:
+        super().__init__(daemon=True)
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self.samples = 0
+
+        # the frame the sampled calls are made from and the code they run,
+        # set by sample_calls, stacks outside those calls are not counted
+        self.root = None
+        self.target = None
+        self.stopped = threading.Event()
+
+    def run(self) -> None:
+        while not self.stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            names = []
+            code = None
+            while frame is not None and frame is not self.root:
+                code = frame.f_code
+                names.append(
+                    f"{code.co_name} ({os.path.basename(code.co_filename)}"
+                    f":{code.co_firstlineno})"
+                )
+                frame = frame.f_back
+            if frame is not None and code is self.target:
+                names.reverse()
+                self.stacks[";".join(names)] += 1
+                self.samples += 1
+
+    def stop(self) -> None:
+        self.stopped.set()
+        self.join()
+
+    def write_collapsed(self, filename: str) -> None:
+        with open(filename, "w") as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+
+# call fn, a python function, again and again for at least seconds while
+# sampling its stack, with the interpreter switching threads often enough for
+# the sampler to run
+def sample_calls(
+    fn, seconds: float = SAMPLE_SECONDS, interval: float = SAMPLE_INTERVAL
+) -> StackSampler:
+    sampler = StackSampler(threading.get_ident(), interval)
+    sampler.root = sys._getframe()
+    sampler.target = fn.__code__
+    switch_interval = sys.getswitchinterval()
+    sys.setswitchinterval(interval / 2)
+    sampler.start()
+    try:
+        deadline = time.perf_counter() + seconds
+        fn()
+        while time.perf_counter() < deadline:
+            fn()
+    finally:
+        sampler.stop()
+        sys.setswitchinterval(switch_interval)
+    return sampler
+
+
+# a file name part for an algorithm name like "A*" or "JPS+"
+def file_name(name: str) -> str:
+    return name.replace("*", "star").replace("+", "plus").lower()
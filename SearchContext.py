@@ -0,0 +1,72 @@
+from Grid import Grid
+
+
+class SearchContext:
+
+    # the generation stamps are int32, start over before they overflow
+    MAX_GENERATION = 2**31 - 1
+
+    # all per-run search state for one grid, preallocated once
+    # a cell's parent and cost are only valid while its seen stamp equals the
+    # current generation, so reset() is O(1) and the context can be reused
+    def __init__(self, grid: Grid) -> None:
+        self.grid = grid
+        self.size = grid.size
+
+        # stamps start at 0, so generation 0 is never current
+        self.generation = 1
+
+        # generation in which a cell was reached, expanded or put on the path
+        self.seen = grid.int_array(0)
+        self.closed = grid.int_array(0)
+        self.on_path = grid.int_array(0)
+
+        # parent cell and g score / distance of every reached cell
+        self.parent = grid.int_array(-1)
+        self.cost = grid.int_array(0)
+
+        # state of the search from the end of bidirectional solvers, see backward()
+        self.reverse: SearchContext = None
+
+    def reset(self) -> None:
+        self.generation += 1
+
+        # clear the stamps only when the counter wraps around
+        if self.generation == SearchContext.MAX_GENERATION:
+            self.seen = self.grid.int_array(0)
+            self.closed = self.grid.int_array(0)
+            self.on_path = self.grid.int_array(0)
+            self.reverse = None
+            self.generation = 1
+
+    # the context of the search from the end, allocated on first use and
+    # stamped with the same generation, so it is reset along with this one
+    def backward(self) -> "SearchContext":
+        if self.reverse is None:
+            self.reverse = SearchContext(self.grid)
+        self.reverse.generation = self.generation
+        return self.reverse
+
+    def is_checked(self, i: int) -> bool:
+        generation = self.generation
+        if self.seen[i] == generation or self.closed[i] == generation:
+            return True
+        reverse = self.reverse
+        return reverse is not None and (
+            reverse.seen[i] == generation or reverse.closed[i] == generation
+        )
+
+    def is_path(self, i: int) -> bool:
+        return self.on_path[i] == self.generation
+
+
+# return a freshly reset context for a search on grid
+# a new one is allocated if none is given
+def begin_search(grid: Grid, context: SearchContext = None) -> SearchContext:
+    if context is None:
+        context = SearchContext(grid)
+    elif context.size != grid.size:
+        raise ValueError("search context was allocated for a different grid size")
+
+    context.reset()
+    return context
@@ -0,0 +1,77 @@
+import queue
+import threading
+from collections import deque
+
+
+class SolverThread(threading.Thread):
+
+    # step events are sent to the ui in batches to keep the queue overhead low
+    BATCH_SIZE = 64
+
+    # runs a solver's step generator in the background and hands its step events
+    # to the ui thread through a bounded queue, so the solver can only get
+    # queue_size batches ahead of the animation and never blocks the window
+    def __init__(self, steps, queue_size: int = 16) -> None:
+        super().__init__(daemon=True)
+        self.steps = steps
+        self.events = queue.Queue(maxsize=queue_size)
+        self.cancelled = threading.Event()
+
+        # set once the generator has finished
+        self.path = None
+        self.error = None
+
+        # ui side: events taken off the queue but not handed out yet
+        self.buffer = deque()
+        self.done = False
+
+    def run(self) -> None:
+        step = self.steps.__next__
+        batch = []
+        try:
+            while not self.cancelled.is_set():
+                for _ in range(SolverThread.BATCH_SIZE):
+                    batch.append(step())
+                self.send(batch)
+                batch = []
+        except StopIteration as finished:
+            self.path = finished.value
+        except Exception as error:
+            self.error = error
+        finally:
+            # None marks the end of the events
+            self.send(batch)
+            self.send(None)
+
+    # put an item on the queue, giving up if the search is cancelled while it is full
+    def send(self, item) -> None:
+        while not self.cancelled.is_set():
+            try:
+                self.events.put(item, timeout=0.05)
+                return
+            except queue.Full:
+                pass
+
+    # stop the search and wait for the thread to exit,
+    # after which it no longer touches the search context
+    def cancel(self) -> None:
+        self.cancelled.set()
+        self.join()
+
+    # take up to n step events without waiting, called from the ui thread
+    def take(self, n: int) -> list:
+        events = []
+        while len(events) < n:
+            if not self.buffer:
+                try:
+                    batch = self.events.get_nowait()
+                except queue.Empty:
+                    break
+                if batch is None:
+                    self.done = True
+                    break
+                self.buffer.extend(batch)
+                continue
+
+            events.append(self.buffer.popleft())
+        return events
@@ -0,0 +1,89 @@
+import math
+
+import pygame
+
+
+class Viewport:
+
+    # largest zoom, in pixels per cell
+    MAX_CELL_SIZE = 64
+
+    # maps grid cells to a rect of the window, zoomed and panned by the user
+    # the whole grid fits in rect at the smallest zoom and the view never leaves the grid
+    def __init__(self, rect: pygame.Rect, width: int, height: int) -> None:
+        self.rect = rect
+        self.width = width
+        self.height = height
+
+        # cell size at which the whole grid fits the rect
+        self.fit_width = rect.width / width
+        self.fit_height = rect.height / height
+
+        self.fit()
+
+    def fit(self) -> None:
+        self.cell_width = self.fit_width
+        self.cell_height = self.fit_height
+
+        # grid coordinates of the top left corner of the view
+        self.offset_x = 0.0
+        self.offset_y = 0.0
+
+    @property
+    def fitted(self) -> bool:
+        return self.cell_width <= self.fit_width
+
+    def clamp(self) -> None:
+        max_x = self.width - self.rect.width / self.cell_width
+        max_y = self.height - self.rect.height / self.cell_height
+        self.offset_x = min(max(self.offset_x, 0.0), max(max_x, 0.0))
+        self.offset_y = min(max(self.offset_y, 0.0), max(max_y, 0.0))
+
+    # zoom by factor keeping the grid point under the screen position pos in place
+    def zoom(self, factor: float, pos: tuple) -> None:
+        px = pos[0] - self.rect.x
+        py = pos[1] - self.rect.y
+        grid_x = self.offset_x + px / self.cell_width
+        grid_y = self.offset_y + py / self.cell_height
+
+        # the zoom is limited by the longer cell side
+        largest = max(self.cell_width, self.cell_height)
+        factor = min(largest * factor, Viewport.MAX_CELL_SIZE) / largest
+        self.cell_width = max(self.cell_width * factor, self.fit_width)
+        self.cell_height = max(self.cell_height * factor, self.fit_height)
+
+        self.offset_x = grid_x - px / self.cell_width
+        self.offset_y = grid_y - py / self.cell_height
+        self.clamp()
+
+    # move the view by a distance in pixels
+    def pan(self, dx: float, dy: float) -> None:
+        self.offset_x -= dx / self.cell_width
+        self.offset_y -= dy / self.cell_height
+        self.clamp()
+
+    # grid cell under the screen position pos, None if there is no cell there
+    def cell_at(self, pos: tuple) -> tuple:
+        if not self.rect.collidepoint(pos):
+            return None
+
+        x = int(self.offset_x + (pos[0] - self.rect.x) / self.cell_width)
+        y = int(self.offset_y + (pos[1] - self.rect.y) / self.cell_height)
+        if 0 <= x < self.width and 0 <= y < self.height:
+            return x, y
+        return None
+
+    # range of cells that are at least partly visible as (x0, y0, x1, y1), end exclusive
+    def visible_cells(self) -> tuple:
+        x0 = int(self.offset_x)
+        y0 = int(self.offset_y)
+        x1 = math.ceil(self.offset_x + self.rect.width / self.cell_width)
+        y1 = math.ceil(self.offset_y + self.rect.height / self.cell_height)
+        return x0, y0, min(x1, self.width), min(y1, self.height)
+
+    # screen position of the top left corner of cell (x, y)
+    def to_screen(self, x: int, y: int) -> tuple:
+        return (
+            self.rect.x + (x - self.offset_x) * self.cell_width,
+            self.rect.y + (y - self.offset_y) * self.cell_height,
+        )
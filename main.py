@@ -1,7 +1,7 @@
 import argparse, sys
 
-from App import App
 from Cli import Cli
+from MazeFile import convert
 
 
 def main() -> None:
@@ -12,26 +12,64 @@ def main() -> None:
         epilog="Made by: Rohan Simon",
     )
 
-    parser.add_argument("-mode", help="Run the GUI or CLI version of the program.", choices=["gui", "cli"])
+    parser.add_argument("-mode", help="Run the GUI or CLI version of the program.", choices=["gui", "cli", "batch", "queues", "startup"])
     parser.add_argument("-random", help="Generate a random NxN maze.")
-    parser.add_argument("filename", help="The file to read the maze from.", nargs="?")
+    parser.add_argument("-generator", help="Maze generator used by -random.", choices=["noise", "backtracker", "kruskal"], default="noise")
+    parser.add_argument("-seed", help="Seed for -random, the same seed always generates the same maze.", type=int)
+    parser.add_argument("-density", help="Fraction of wall cells in -random noise mazes.", type=float, default=0.3)
+    parser.add_argument("-terrain", help="Highest cost of a cell in -random mazes, cells cost 1 to TERRAIN to step onto.", type=int, choices=range(1, 10), metavar="TERRAIN", default=1)
+    parser.add_argument("-repeat", help="Timed runs of each algorithm in CLI mode.", type=int, default=1)
+    parser.add_argument("-warmup", help="Untimed runs of each algorithm before timing in CLI mode.", type=int, default=0)
+    parser.add_argument("-output", help="Write CLI results to OUTPUT.json and OUTPUT.csv.")
+    parser.add_argument("-workers", help="Worker processes in batch mode, defaults to one per CPU.", type=int)
+    parser.add_argument("-pin", help="Comma separated CPUs to pin the batch mode workers to.")
+    parser.add_argument("-starts", help="File of start cells, one \"x y\" per line, to answer distances to the maze's end from in CLI mode.")
+    parser.add_argument("-stats", help="Count expanded cells, pushes, stale pops and the peak frontier and memory of every algorithm in CLI and batch mode, in one extra run after the timed ones.", action="store_true")
+    parser.add_argument("-algorithms", help="Comma separated algorithms to run in CLI and batch mode, all of them by default.")
+    parser.add_argument("-profile", help="Profile the algorithms in CLI mode under cProfile and a stack sampler instead of timing them, writing OUTPUT-algorithm.pstats and .collapsed files.", action="store_true")
+    parser.add_argument("-nocache", help="Parse the maze files in CLI and batch mode instead of using the parsed maze cache.", action="store_true")
+    parser.add_argument("-convert", help="Convert the maze file to CONVERT, the text or binary (.bmaze) format is picked by extension.")
+    parser.add_argument("filename", help="The file to read the maze from, or a directory or glob of maze files in batch mode.", nargs="?")
 
     args = parser.parse_args()
 
-    if args.mode == "gui":
-        app = App()
+    if args.convert and args.filename:
+        convert(args.filename, args.convert)
+
+    elif args.mode == "gui":
+        # pygame and pygame_gui are only loaded for the gui
+        from App import App
+
+        app = App(filename=args.filename)
         app.run()
 
     elif args.mode == "cli" and args.filename:
-        cli = Cli(args.filename)
-        cli.run()
+        algorithms = args.algorithms.split(",") if args.algorithms else None
+        cli = Cli(args.filename, args.repeat, args.warmup, args.output, not args.nocache, args.stats, algorithms)
+        if args.profile:
+            cli.run_profile()
+        elif args.starts:
+            cli.run_starts(args.starts)
+        else:
+            cli.run()
+
+    elif args.mode == "batch" and args.filename:
+        cpus = [int(cpu) for cpu in args.pin.split(",")] if args.pin else None
+        algorithms = args.algorithms.split(",") if args.algorithms else None
+        Cli.run_batch(args.filename, args.repeat, args.warmup, args.output, args.workers, cpus, algorithms, args.stats, not args.nocache)
+
+    elif args.mode == "queues":
+        Cli.run_queues(args.filename or "TestMazes", args.repeat, args.warmup, args.output, args.seed)
+
+    elif args.mode == "startup":
+        Cli.run_startup(args.repeat, args.output)
 
     elif args.random:
-        cli = Cli.generate_random_maze(int(args.random))
+        Cli.generate_random_maze(int(args.random), args.generator, args.seed, args.density, args.filename, args.terrain)
         return
     else:
-        if not args.filename and args.mode == "cli":
-            print("No filename was provided when running in CLI mode.")
+        if not args.filename and args.mode in ("cli", "batch"):
+            print(f"No filename was provided when running in {args.mode.upper()} mode.")
         else:
             parser.print_help(sys.stderr)
 